@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Summarize handler/query timings logged by the instrumented app.R build
+(generate_button_function_map.py --instrument-out).
+
+Log files are streamed line by line (plain or .gz, or `-` for stdin). For every
+button it reports click count, p50/p95/p99 handler latency, and p50/p95/p99 of
+the DB time spent inside one click.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def open_log(path: str):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_records(paths: Iterable[str]) -> Iterator[dict]:
+    for path in paths:
+        handle = open_log(path)
+        try:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Linear interpolation between closest ranks (same as numpy's default)."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    frac = rank - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * frac
+
+
+def collect(records: Iterable[dict]) -> tuple[dict[str, dict], dict[str, int]]:
+    """
+    Fold the record stream into per-handler samples. Query time is summed per
+    (session, invocation) until the matching handler record arrives, so only
+    in-flight clicks are held in memory.
+    """
+    stats: dict[str, dict] = defaultdict(
+        lambda: {"line": None, "latency": array("d"), "db_ms": array("d"), "queries": 0}
+    )
+    pending: dict[tuple, list] = {}
+    counts = {"handler": 0, "query": 0, "unattributed_queries": 0}
+
+    for rec in records:
+        event = rec.get("event")
+        key = (rec.get("session"), rec.get("invocation"))
+        if event == "query":
+            counts["query"] += 1
+            if rec.get("invocation") is None:
+                counts["unattributed_queries"] += 1
+                continue
+            slot = pending.setdefault(key, [0.0, 0])
+            slot[0] += float(rec.get("elapsed_ms") or 0.0)
+            slot[1] += 1
+        elif event == "handler":
+            counts["handler"] += 1
+            entry = stats[str(rec.get("handler"))]
+            entry["line"] = rec.get("line")
+            entry["latency"].append(float(rec.get("elapsed_ms") or 0.0))
+            db_ms, n_queries = pending.pop(key, (0.0, 0))
+            entry["db_ms"].append(db_ms)
+            entry["queries"] += n_queries
+    return stats, counts
+
+
+def summarize(stats: dict[str, dict]) -> list[dict]:
+    rows = []
+    for handler, entry in stats.items():
+        latency = sorted(entry["latency"])
+        db_ms = sorted(entry["db_ms"])
+        clicks = len(latency)
+        row = {
+            "handler": handler,
+            "line": entry["line"],
+            "clicks": clicks,
+            "queries_per_click": round(entry["queries"] / clicks, 2) if clicks else 0,
+        }
+        for pct in PERCENTILES:
+            row[f"latency_p{pct}_ms"] = round(percentile(latency, pct), 2)
+        for pct in PERCENTILES:
+            row[f"db_p{pct}_ms"] = round(percentile(db_ms, pct), 2)
+        rows.append(row)
+    return sorted(rows, key=lambda r: (-r["latency_p95_ms"], r["handler"]))
+
+
+def render_table(rows: list[dict]) -> str:
+    header = ["Handler", "Line", "Clicks", "Queries/click"]
+    header += [f"p{p} ms" for p in PERCENTILES]
+    header += [f"DB p{p} ms" for p in PERCENTILES]
+    lines = ["| " + " | ".join(header) + " |", "|---|---:|" + "---:|" * (len(header) - 2)]
+    for r in rows:
+        cells = [f"`{r['handler']}`", str(r["line"] or "-"), str(r["clicks"]), str(r["queries_per_click"])]
+        cells += [f"{r[f'latency_p{p}_ms']:.2f}" for p in PERCENTILES]
+        cells += [f"{r[f'db_p{p}_ms']:.2f}" for p in PERCENTILES]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report per-button latency from instrumented app.R timing logs.")
+    parser.add_argument("logs", nargs="+", help="JSONL timing log(s); .gz supported, '-' reads stdin")
+    parser.add_argument("--json", dest="json_out", default=None, help="Also write the summary as JSON to this path")
+    args = parser.parse_args()
+
+    stats, counts = collect(iter_records(args.logs))
+    rows = summarize(stats)
+
+    print(render_table(rows) if rows else "No handler records found.")
+    print("")
+    print(f"[INFO] handler records: {counts['handler']}")
+    print(f"[INFO] query records: {counts['query']} ({counts['unattributed_queries']} outside any handler)")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(rows, indent=2) + "\n", encoding="utf-8")
+        print(f"[OK] Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
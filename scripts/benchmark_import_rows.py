@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the legacy importer's row path.
+
+Compares csv.DictReader dicts ("dict", the old path) with the header-indexed
+csv.reader + LegacyRow records with interned values ("tuple",
+import_legacy_projects.iter_legacy_rows). Each mode runs in a fresh
+interpreter so peak RSS is not shared:
+
+- stage: read every row of the CSV and keep them in a list (the batching case);
+  reports peak RSS, wall time and retained blocks per row: memory blocks
+  still live after staging (sys.getallocatedblocks delta / rows). This is
+  the footprint of a staged row, not an allocation rate.
+- import (with --db): stream the CSV into a scratch copy of the DB with
+  import_rows(); reports peak RSS and rows/s. Nothing is retained per row,
+  so there is no blocks figure.
+
+Without --csv a synthetic legacy_projects.csv with --rows rows is generated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import import_legacy_projects as importer
+
+
+MODES = ("dict", "tuple")
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def write_synthetic_csv(path: Path, rows: int, start_id: int = 900000) -> None:
+    """Legacy-export-like data: few groups, logins and lookup labels repeated over many rows."""
+    rng = random.Random(1)
+    groups = [f"Group {i:02d}" for i in range(40)]
+    logins = [f"user{i:03d}" for i in range(300)]
+    genomes = ["hg38", "mm10", "dm6", "sacCer3", "NA", ""]
+    types = ["RNA-seq", "ChIP-seq", "ATAC-seq", "WGS", "Amplicon"]
+    platforms = ["NovaSeq", "NextSeq", "MiSeq", "HiSeq"]
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(importer.LEGACY_COLUMNS)
+        for i in range(rows):
+            login = rng.choice(logins)
+            group = rng.choice(groups)
+            kind = rng.choice(types)
+            writer.writerow(
+                [
+                    start_id + i,
+                    f"Legacy project {start_id + i}",
+                    login,
+                    f"Full Name {login}",
+                    group,
+                    rng.choice(genomes),
+                    kind,
+                    kind,
+                    rng.choice(["75", "150", "300", ""]),
+                    group.replace("Group ", "K"),
+                    rng.choice(platforms),
+                    "" if rng.random() < 0.8 else "imported from perl VM",
+                ]
+            )
+
+
+def open_rows(mode: str, handle):
+    return csv.DictReader(handle) if mode == "dict" else importer.iter_legacy_rows(handle)
+
+
+def run_stage(mode: str, csv_path: Path) -> dict:
+    blocks_before = sys.getallocatedblocks()
+    started = time.perf_counter()
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        staged = list(open_rows(mode, handle))
+    elapsed = time.perf_counter() - started
+    blocks = sys.getallocatedblocks() - blocks_before
+    return {
+        "mode": mode,
+        "task": "stage",
+        "rows": len(staged),
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "retained_blocks_per_row": round(blocks / len(staged), 1) if staged else 0.0,
+    }
+
+
+def run_import(mode: str, csv_path: Path, db_path: Path) -> dict:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    importer.prepare_database(conn)
+    conn.commit()
+    started = time.perf_counter()
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        result = importer.import_rows(conn, open_rows(mode, handle))
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    rows = result["inserted"] + result["skipped"] + result["invalid"]
+    return {
+        "mode": mode,
+        "task": "import",
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rows_per_s": round(rows / elapsed) if elapsed else 0,
+    }
+
+
+def run_worker(mode: str, task: str, csv_path: Path, db_path: Path | None) -> dict:
+    """Run one mode/task in a fresh interpreter and return its JSON result."""
+    cmd = [sys.executable, __file__, "--worker", mode, "--task", task, "--csv", str(csv_path)]
+    if db_path:
+        cmd += ["--db", str(db_path)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare peak RSS and allocations of the importer row paths.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic CSV size when --csv is not given")
+    parser.add_argument("--csv", default=None, help="Existing legacy_projects.csv to read instead")
+    parser.add_argument("--db", default=None, help="Also time a full import into a scratch copy of this DB")
+    parser.add_argument("--json", dest="json_out", default=None, help="Write the results as JSON to this path")
+    parser.add_argument("--worker", choices=MODES, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--task", choices=("stage", "import"), default="stage", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.task == "import":
+            result = run_import(args.worker, Path(args.csv), Path(args.db))
+        else:
+            result = run_stage(args.worker, Path(args.csv))
+        print(json.dumps(result))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="import-bench-") as tmp:
+        tmp_dir = Path(tmp)
+        if args.csv:
+            csv_path = Path(args.csv)
+        else:
+            csv_path = tmp_dir / "legacy_projects.csv"
+            write_synthetic_csv(csv_path, args.rows)
+            print(f"[INFO] Generated {args.rows} synthetic rows ({csv_path.stat().st_size / 1e6:.1f} MB)")
+
+        results = [run_worker(mode, "stage", csv_path, None) for mode in MODES]
+        if args.db:
+            for mode in MODES:
+                scratch = tmp_dir / f"scratch-{mode}.db"
+                shutil.copyfile(args.db, scratch)
+                results.append(run_worker(mode, "import", csv_path, scratch))
+
+    print("| Mode | Task | Rows | Seconds | Peak RSS MB | Retained blocks/row | Rows/s |")
+    print("|---|---|---:|---:|---:|---:|---:|")
+    for r in results:
+        print(
+            f"| {r['mode']} | {r['task']} | {r['rows']} | {r['seconds']} | {r['peak_rss_mb']} | "
+            f"{r.get('retained_blocks_per_row', '-')} | {r.get('rows_per_s', '-')} |"
+        )
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"[OK] Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Health report and routine maintenance for sequencing_projects.db.
+
+Collects file/page metrics and per-table/index sizes and fragmentation from
+the dbstat virtual table, refreshes planner statistics (ANALYZE of tables whose
+sqlite_stat1 is missing or stale, then PRAGMA optimize) and returns free pages
+to the OS with PRAGMA incremental_vacuum in bounded steps. Before/after
+metrics are written as JSON.
+
+Safe to run from cron while the app is live: every write step is a short
+transaction with a busy timeout, ANALYZE is bounded by analysis_limit, and the
+only full rewrite (the one-time VACUUM that switches the file to
+auto_vacuum=INCREMENTAL) runs only with --enable-incremental-vacuum.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = REPO_ROOT / "sequencing-app" / "sequencing_projects.db"
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+# sqlite_stat1 row estimates further off than this (relative) count as stale.
+STALE_STATS_RATIO = 0.25
+
+
+def pragma(conn: sqlite3.Connection, name: str):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def object_stats(conn: sqlite3.Connection) -> list[dict] | None:
+    """
+    Per table/index: pages, bytes, fill (share of page bytes holding data) and
+    fragmentation (share of leaf-page steps that are not to the next page in
+    the file). Returns None if SQLite was built without dbstat.
+    """
+    kinds = {
+        name: (kind, tbl)
+        for name, kind, tbl in conn.execute("SELECT name, type, tbl_name FROM sqlite_master")
+    }
+    try:
+        cursor = conn.execute("SELECT name, pageno, pagetype, unused, pgsize FROM dbstat")
+    except sqlite3.OperationalError:
+        return None
+
+    stats: dict[str, dict] = {}
+    last_leaf: dict[str, int] = {}
+    for name, pageno, pagetype, unused, pgsize in cursor:
+        kind, tbl = kinds.get(name, ("table", name))
+        entry = stats.setdefault(
+            name,
+            {"name": name, "type": kind, "table": tbl, "pages": 0, "bytes": 0, "unused_bytes": 0,
+             "leaf_pages": 0, "leaf_jumps": 0},
+        )
+        entry["pages"] += 1
+        entry["bytes"] += pgsize
+        entry["unused_bytes"] += unused or 0
+        if pagetype == "leaf":
+            if name in last_leaf and pageno != last_leaf[name] + 1:
+                entry["leaf_jumps"] += 1
+            last_leaf[name] = pageno
+            entry["leaf_pages"] += 1
+
+    rows = []
+    for entry in stats.values():
+        steps = entry["leaf_pages"] - 1
+        entry["fill_pct"] = round(100.0 * (entry["bytes"] - entry["unused_bytes"]) / entry["bytes"], 1)
+        entry["fragmentation_pct"] = round(100.0 * entry["leaf_jumps"] / steps, 1) if steps > 0 else 0.0
+        rows.append(entry)
+    return sorted(rows, key=lambda r: (-r["bytes"], r["name"]))
+
+
+def stale_tables(conn: sqlite3.Connection) -> dict[str, str]:
+    """Tables whose sqlite_stat1 row estimate is missing or off by more than STALE_STATS_RATIO."""
+    tables = [
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )
+    ]
+    estimates: dict[str, int] = {}
+    has_stat1 = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone()
+    if has_stat1:
+        for tbl, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            if stat:
+                estimates[tbl] = max(estimates.get(tbl, 0), int(stat.split()[0]))
+
+    stale = {}
+    for table in tables:
+        actual = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        if table not in estimates:
+            if actual:
+                stale[table] = "no statistics"
+        elif abs(actual - estimates[table]) > STALE_STATS_RATIO * max(actual, estimates[table]):
+            stale[table] = f"estimate {estimates[table]} rows, actual {actual}"
+    return stale
+
+
+def collect_metrics(conn: sqlite3.Connection, db_path: str) -> dict:
+    page_size = pragma(conn, "page_size")
+    page_count = pragma(conn, "page_count")
+    freelist = pragma(conn, "freelist_count")
+    return {
+        "file_bytes": os.path.getsize(db_path),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "free_pct": round(100.0 * freelist / page_count, 1) if page_count else 0.0,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(pragma(conn, "auto_vacuum"), "unknown"),
+        "journal_mode": pragma(conn, "journal_mode"),
+        "stale_statistics": stale_tables(conn),
+        "objects": object_stats(conn),
+    }
+
+
+def refresh_statistics(conn: sqlite3.Connection, stale: dict[str, str], analysis_limit: int) -> list[str]:
+    actions = []
+    conn.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+    for table in stale:
+        conn.execute(f'ANALYZE "{table}"')
+        actions.append(f"ANALYZE {table} ({stale[table]})")
+    conn.execute("PRAGMA optimize")
+    actions.append("PRAGMA optimize")
+    return actions
+
+
+def incremental_vacuum(conn: sqlite3.Connection, step_pages: int, max_pages: int, pause_s: float) -> int:
+    """Release up to max_pages free pages, step_pages per write transaction."""
+    released = 0
+    while released < max_pages:
+        before = pragma(conn, "freelist_count")
+        if not before:
+            break
+        step = min(step_pages, max_pages - released)
+        conn.execute(f"PRAGMA incremental_vacuum({step})").fetchall()
+        freed = before - pragma(conn, "freelist_count")
+        if freed <= 0:
+            break
+        released += freed
+        time.sleep(pause_s)
+    return released
+
+
+def print_summary(label: str, metrics: dict) -> None:
+    print(
+        f"[INFO] {label}: {metrics['file_bytes'] / 1024:.0f} KiB, {metrics['page_count']} pages, "
+        f"{metrics['freelist_count']} free ({metrics['free_pct']}%), auto_vacuum={metrics['auto_vacuum']}, "
+        f"stale statistics: {len(metrics['stale_statistics'])} tables"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report and maintain sequencing_projects.db health.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to sequencing_projects.db")
+    parser.add_argument("--json", dest="json_out", default=None, help="Write before/after metrics as JSON to this path")
+    parser.add_argument("--report-only", action="store_true", help="Only collect metrics, change nothing")
+    parser.add_argument("--analysis-limit", type=int, default=1000, help="PRAGMA analysis_limit for ANALYZE (0 = exact)")
+    parser.add_argument("--vacuum-step", type=int, default=256, help="Free pages released per incremental_vacuum step")
+    parser.add_argument("--max-vacuum-pages", type=int, default=20000, help="Stop after releasing this many pages")
+    parser.add_argument("--pause-ms", type=int, default=50, help="Pause between vacuum steps so the app can write")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000, help="SQLite busy timeout")
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="One-time: switch auto_vacuum to INCREMENTAL (runs a full VACUUM; do it in a quiet period)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] DB not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
+
+    report = {"db": args.db, "started": dt.datetime.now().isoformat(timespec="seconds"), "actions": []}
+    try:
+        before = collect_metrics(conn, args.db)
+        report["before"] = before
+        print_summary("Before", before)
+        if before["objects"] is None:
+            print("[WARN] dbstat is not available in this SQLite build; per-table sizes skipped")
+
+        if not args.report_only:
+            report["actions"] += refresh_statistics(conn, before["stale_statistics"], args.analysis_limit)
+
+            if args.enable_incremental_vacuum and before["auto_vacuum"] != "incremental":
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                report["actions"].append("auto_vacuum=INCREMENTAL + VACUUM")
+            elif before["auto_vacuum"] == "none" and before["freelist_count"]:
+                print(
+                    "[WARN] auto_vacuum is off: free pages are reused but the file never shrinks. "
+                    "Run once with --enable-incremental-vacuum in a quiet period."
+                )
+
+            if pragma(conn, "auto_vacuum") == 2:
+                released = incremental_vacuum(
+                    conn, args.vacuum_step, args.max_vacuum_pages, args.pause_ms / 1000.0
+                )
+                report["actions"].append(f"incremental_vacuum released {released} pages")
+
+        after = collect_metrics(conn, args.db)
+        report["after"] = after
+    except sqlite3.OperationalError as exc:
+        print(f"[ERROR] {exc}")
+        return 1
+    finally:
+        conn.close()
+
+    for action in report["actions"]:
+        print(f"[OK] {action}")
+    print_summary("After", after)
+    if after["objects"]:
+        for obj in after["objects"][:10]:
+            print(
+                f"[INFO]   {obj['type']:<5} {obj['name']:<40} {obj['bytes'] / 1024:>8.0f} KiB "
+                f"fill {obj['fill_pct']:>5}%  fragmentation {obj['fragmentation_pct']:>5}%"
+            )
+
+    report["finished"] = dt.datetime.now().isoformat(timespec="seconds")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"[OK] Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
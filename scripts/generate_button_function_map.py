@@ -1,21 +1,41 @@
 #!/usr/bin/env python3
 """
 Generate a QMD report that maps Shiny action buttons to observeEvent handlers
-and highlights the main function calls/side effects in each handler.
+and highlights the main function calls/side effects in each handler, including
+the DB/email work reached transitively through custom helper functions.
+Also analyzes the reactive dependency graph (inputs, reactiveVal/reactiveValues,
+reactive(), observe(), render*()) to show what each click invalidates.
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
 import datetime as dt
+import hashlib
+import json
+import multiprocessing
 import re
+import sqlite3
+import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, Iterator
 
 
 ACTION_BUTTON_RE = re.compile(r'actionButton\(\s*"([A-Za-z0-9_]+)"\s*(?:,\s*"([^"]*)")?')
 OBSERVE_EVENT_RE = re.compile(r'observeEvent\(\s*input\$([A-Za-z0-9_]+)\s*,')
 FUNCTION_DEF_RE = re.compile(r"^\s*([A-Za-z][A-Za-z0-9_.]*)\s*<-\s*function\s*\(")
 FUNCTION_CALL_RE = re.compile(r"\b([A-Za-z][A-Za-z0-9_.]*)\s*\(")
+REACTIVE_DEF_RE = re.compile(
+    r"^\s*([A-Za-z][A-Za-z0-9_.]*)\s*<-\s*(reactiveValues|reactiveVal|reactive)\s*\("
+)
+OUTPUT_DEF_RE = re.compile(r"^\s*output\$([A-Za-z0-9_]+)\s*<-\s*(render[A-Za-z]*)\s*\(")
+OBSERVE_RE = re.compile(r"\bobserve\(")
+OBSERVE_EVENT_ANY_RE = re.compile(r"\bobserveEvent\(\s*(.+?)\s*,", re.DOTALL)
+INPUT_READ_RE = re.compile(r"\binput\$([A-Za-z0-9_]+)")
+DB_CALL_RE = re.compile(r"(?<![A-Za-z0-9_.$:])(dbGetQuery|dbExecute)\s*\(")
 
 
 KEYWORDS = {
@@ -75,6 +95,25 @@ IMPORTANT_CALLS = {
     "validate_and_repair_database",
 }
 
+EMAIL_CALLS = {
+    "send_project_creation_email",
+    "send_project_cost_notification_email",
+    "send_data_released_email",
+}
+
+# Primitive calls that make up the transitive cost of a click.
+COST_CALLS = {
+    "db_reads": {"dbGetQuery"},
+    "db_writes": {"dbExecute"},
+    "emails": EMAIL_CALLS,
+    "connections": {"dbConnect"},
+}
+
+# Idempotent schema migration and seed helpers (run by get_db_connection() on
+# every connection, and lazily by some loaders). They are connection setup, not
+# work done for the click: left out of costs, SQL and reached functions.
+SETUP_HELPER_RE = re.compile(r"^(ensure|migrate|seed)_")
+
 CORE_WORKFLOW_IDS = {
     "new_project_btn",
     "create_project_btn",
@@ -89,21 +128,35 @@ CORE_WORKFLOW_IDS = {
 }
 
 
-def find_block_end(lines: list[str], start_idx: int) -> int:
-    """Find matching closing brace for an observeEvent block."""
-    depth = 0
-    started = False
-    for idx in range(start_idx, len(lines)):
-        line = lines[idx]
+def build_block_index(lines: list[str]) -> list[int]:
+    """
+    Match braces in one pass: for every line, the line that closes the first
+    block opened at or after it. Nested blocks (functions inside server, handlers
+    inside observers) are resolved without rescanning the file.
+    """
+    last = len(lines) - 1
+    open_lines: list[int] = []
+    close_lines: list[int] = []
+    first_open: dict[int, int] = {}
+    stack: list[int] = []
+    for idx, line in enumerate(lines):
         for ch in line:
             if ch == "{":
-                depth += 1
-                started = True
-            elif ch == "}":
-                depth -= 1
-        if started and depth == 0:
-            return idx
-    return len(lines) - 1
+                first_open.setdefault(idx, len(open_lines))
+                stack.append(len(open_lines))
+                open_lines.append(idx)
+                close_lines.append(last)
+            elif ch == "}" and stack:
+                close_lines[stack.pop()] = idx
+
+    ends = [last] * len(lines)
+    next_open = None
+    for idx in range(last, -1, -1):
+        if idx in first_open:
+            next_open = first_open[idx]
+        if next_open is not None:
+            ends[idx] = close_lines[next_open]
+    return ends
 
 
 def ordered_unique(items: list[str]) -> list[str]:
@@ -116,6 +169,17 @@ def ordered_unique(items: list[str]) -> list[str]:
     return out
 
 
+def ordered_unique_by(items: list, key) -> list:
+    seen = set()
+    out = []
+    for item in items:
+        k = key(item)
+        if k not in seen:
+            seen.add(k)
+            out.append(item)
+    return out
+
+
 def safe_mermaid_id(raw: str) -> str:
     return re.sub(r"[^A-Za-z0-9_]", "_", raw)
 
@@ -142,6 +206,188 @@ def collect_custom_functions(lines: list[str]) -> set[str]:
     return fns
 
 
+def expression_end(lines: list[str], idx: int, block_ends: list[int], start: int = 0) -> int:
+    """
+    End line of a call or function starting at lines[idx][start:]. Braced bodies
+    end at the matching brace; braceless one-liners end on the same line.
+    """
+    line = lines[idx][start:]
+    if "{" not in line:
+        depth = 0
+        for ch in line:
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+                if depth == 0:
+                    return idx
+    return block_ends[idx]
+
+
+def iter_function_lines(lines: list[str], block_ends: list[int]):
+    """
+    Yield (function name, line fragment) for every line inside a custom function,
+    attributed to the innermost enclosing function only.
+    """
+    stack: list[tuple[str, int]] = []
+    for idx, line in enumerate(lines):
+        while stack and stack[-1][1] < idx:
+            stack.pop()
+        m = FUNCTION_DEF_RE.search(line)
+        if m:
+            start = line.find("function", m.start())
+            stack.append((m.group(1), expression_end(lines, idx, block_ends, start)))
+            line = line[m.end() :]
+        if stack:
+            yield stack[-1][0], line
+
+
+def build_call_graph(
+    lines: list[str],
+    custom_functions: set[str],
+    block_ends: list[int],
+) -> dict[str, Counter]:
+    """
+    Direct calls per custom function, keyed by function name. Each call site is
+    attributed to the innermost enclosing function, so a helper defined inside
+    another function does not count as being called by it. Functions defined
+    more than once (different scopes) are merged by name.
+    """
+    graph: dict[str, Counter] = {name: Counter() for name in custom_functions}
+    for name, line in iter_function_lines(lines, block_ends):
+        calls = graph[name]
+        for call in FUNCTION_CALL_RE.findall(line):
+            if call not in KEYWORDS:
+                calls[call] += 1
+    return graph
+
+
+def strongly_connected_components(edges: dict[str, set[str]]) -> list[list[str]]:
+    """Iterative Tarjan; components come out in reverse topological order (callees first)."""
+    index: dict[str, int] = {}
+    low: dict[str, int] = {}
+    on_stack: set[str] = set()
+    stack: list[str] = []
+    components: list[list[str]] = []
+
+    for root in sorted(edges):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(edges[root])))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges[child]))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+    return components
+
+
+def compute_reachability(call_graph: dict[str, Counter]) -> dict[str, frozenset[str]]:
+    """
+    Custom functions reachable from each custom function (itself included).
+    Cycles are collapsed into one component, and each component's reachable
+    set is computed once from its callees' memoized sets.
+    """
+    edges = {
+        name: {callee for callee in calls if callee in call_graph}
+        for name, calls in call_graph.items()
+    }
+    reach: dict[str, frozenset[str]] = {}
+    for component in strongly_connected_components(edges):
+        members = set(component)
+        reached = set(members)
+        for name in component:
+            for callee in edges[name]:
+                if callee not in members:
+                    reached |= reach[callee]
+        frozen = frozenset(reached)
+        for name in component:
+            reach[name] = frozen
+    return reach
+
+
+def without_setup_helpers(call_graph: dict[str, Counter]) -> dict[str, Counter]:
+    """
+    Copy of the call graph without the SETUP_HELPER_RE functions and the calls
+    to them. Functions only they call (e.g. seed row lists) become unreachable.
+    """
+    return {
+        name: Counter({c: n for c, n in calls.items() if not SETUP_HELPER_RE.match(c)})
+        for name, calls in call_graph.items()
+        if not SETUP_HELPER_RE.match(name)
+    }
+
+
+def count_cost_calls(calls: Counter) -> Counter:
+    return Counter({metric: sum(calls[n] for n in names) for metric, names in COST_CALLS.items()})
+
+
+def function_costs(call_graph: dict[str, Counter]) -> dict[str, Counter]:
+    """
+    Transitive COST_CALLS per custom function, weighted by call sites:
+    cost(f) = own(f) + sum(calls[f][g] * cost(g)) over custom callees g.
+    A cycle is collapsed into one component whose members share one cost:
+    each member's own call sites once, plus its calls out of the component.
+    """
+    edges = {
+        name: {callee for callee in calls if callee in call_graph}
+        for name, calls in call_graph.items()
+    }
+    costs: dict[str, Counter] = {}
+    for component in strongly_connected_components(edges):
+        members = set(component)
+        total = Counter()
+        for name in component:
+            calls = call_graph[name]
+            total.update(count_cost_calls(calls))
+            for callee in edges[name]:
+                if callee not in members:
+                    for metric, value in costs[callee].items():
+                        total[metric] += calls[callee] * value
+        for name in component:
+            costs[name] = total
+    return costs
+
+
+def transitive_costs(direct_calls: Counter, costs: dict[str, Counter]) -> dict[str, int]:
+    """
+    COST_CALLS of a handler block: its own call sites plus the function_costs()
+    of every custom function it calls, times the number of call sites.
+    """
+    totals = count_cost_calls(direct_calls)
+    for name, n in direct_calls.items():
+        if name in costs:
+            for metric, value in costs[name].items():
+                totals[metric] += n * value
+    return {metric: totals[metric] for metric in COST_CALLS}
+
+
 def side_effects_from_calls(calls: list[str]) -> list[str]:
     effects = []
     callset = set(calls)
@@ -186,6 +432,118 @@ def extract_sql_targets(block: str) -> list[str]:
     return ordered_unique(targets)
 
 
+REPLAYABLE_SQL_RE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE|PRAGMA)\b", re.IGNORECASE)
+ASSIGNMENT_RE = re.compile(r"(?<![A-Za-z0-9_.$])([A-Za-z][A-Za-z0-9_.]*)\s*<-\s*")
+
+
+def split_call_args(text: str, open_pos: int) -> tuple[list[str], int]:
+    """
+    Split the R argument list whose "(" is at text[open_pos] into top-level
+    argument strings. Quoted strings and nested brackets are skipped over.
+    Returns the arguments and the position of the closing ")".
+    """
+    args = []
+    depth = 0
+    start = open_pos + 1
+    idx = open_pos
+    while idx < len(text):
+        ch = text[idx]
+        if ch in "\"'":
+            idx += 1
+            while idx < len(text) and text[idx] != ch:
+                idx += 2 if text[idx] == "\\" else 1
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+            if depth == 0:
+                args.append(text[start:idx].strip())
+                return [a for a in args if a], idx
+        elif ch == "," and depth == 1:
+            args.append(text[start:idx].strip())
+            start = idx + 1
+        idx += 1
+    return [a for a in args if a], len(text)
+
+
+def r_string_literal(expr: str) -> str | None:
+    if len(expr) >= 2 and expr[0] in "\"'" and expr[-1] == expr[0]:
+        body = expr[1:-1]
+        return re.sub(r"\\(.)", lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)), body)
+    return None
+
+
+def sql_from_expr(expr: str, assignments: dict[str, str], depth: int = 0) -> str | None:
+    """
+    Best-effort static value of an R SQL expression: a string literal, a
+    paste()/paste0() of literals (non-literal pieces become NULL), or a variable
+    assigned one of those earlier in the same block.
+    """
+    expr = expr.strip()
+    literal = r_string_literal(expr)
+    if literal is not None:
+        return literal
+    m = re.match(r"(paste0|paste)\s*\(", expr)
+    if m:
+        args, _ = split_call_args(expr, m.end() - 1)
+        sep = "" if m.group(1) == "paste0" else " "
+        parts = []
+        for arg in args:
+            if re.match(r"(sep|collapse)\s*=", arg):
+                continue
+            part = sql_from_expr(arg, assignments, depth + 1) if depth < 3 else None
+            parts.append(part if part is not None else "NULL")
+        return sep.join(parts)
+    if depth < 3 and re.fullmatch(r"[A-Za-z][A-Za-z0-9_.]*", expr) and expr in assignments:
+        return sql_from_expr(assignments[expr], assignments, depth + 1)
+    return None
+
+
+def extract_sql_statements(block: str, first_line: int = 1) -> list[dict]:
+    """
+    Static SQL passed to dbGetQuery()/dbExecute() in a code block, with the
+    source line of each call. Statements that cannot be resolved statically, or
+    that change the schema, are left out.
+    """
+    statements = []
+    assignments: dict[str, str] = {}
+    last_assignment = 0
+    for m in DB_CALL_RE.finditer(block):
+        for a in ASSIGNMENT_RE.finditer(block, last_assignment, m.start()):
+            value_args, _ = split_call_args("(" + block[a.end() : m.start()], 0)
+            if value_args:
+                assignments[a.group(1)] = value_args[0]
+        last_assignment = m.start()
+        args, _ = split_call_args(block, m.end() - 1)
+        positional = [a for a in args if not re.match(r"[A-Za-z_.]+\s*=[^=]", a)]
+        named = {a.split("=", 1)[0].strip(): a.split("=", 1)[1] for a in args if a not in positional}
+        expr = named.get("statement") or (positional[1] if len(positional) > 1 else None)
+        sql = sql_from_expr(expr, assignments) if expr else None
+        if not sql or not REPLAYABLE_SQL_RE.match(sql):
+            continue
+        statements.append(
+            {
+                "fn": m.group(1),
+                "line": first_line + block.count("\n", 0, m.start()),
+                "sql": re.sub(r"\s+", " ", sql).strip(),
+            }
+        )
+    return statements
+
+
+def collect_function_sql(lines: list[str], block_ends: list[int]) -> dict[str, list[dict]]:
+    """Static SQL statements per custom function (whole body, merged by name)."""
+    result: dict[str, list[dict]] = {}
+    for idx, line in enumerate(lines):
+        m = FUNCTION_DEF_RE.search(line)
+        if not m:
+            continue
+        end_idx = expression_end(lines, idx, block_ends, line.find("function", m.start()))
+        block = "\n".join(lines[idx : end_idx + 1])
+        result.setdefault(m.group(1), []).extend(extract_sql_statements(block, idx + 1))
+    return result
+
+
 def extract_notification_messages(block: str) -> list[str]:
     msgs = []
     for m in re.finditer(r"showNotification\(\s*([\"'])(.*?)\1", block, flags=re.DOTALL):
@@ -255,32 +613,60 @@ def infer_purpose(input_id: str, label: str, calls: list[str], effects: list[str
     return "Handle this UI event and update app state."
 
 
-def collect_handlers(
+def iter_handlers(
     lines: list[str],
     action_buttons: dict[str, dict[str, str | int]],
     custom_functions: set[str],
-) -> list[dict]:
-    handlers = []
+    call_graph: dict[str, Counter] | None = None,
+    block_ends: list[int] | None = None,
+) -> Iterator[dict]:
+    """Yield one handler record per observeEvent(input$...), in source order."""
+    if block_ends is None:
+        block_ends = build_block_index(lines)
+    if call_graph is None:
+        call_graph = build_call_graph(lines, custom_functions, block_ends)
+    call_graph = without_setup_helpers(call_graph)
+    reachability = compute_reachability(call_graph)
+    costs_by_function = function_costs(call_graph)
+    function_sql = collect_function_sql(lines, block_ends)
+
     for i, line in enumerate(lines, start=1):
         m = OBSERVE_EVENT_RE.search(line)
         if not m:
             continue
         input_id = m.group(1)
         start_idx = i - 1
-        end_idx = find_block_end(lines, start_idx)
+        end_idx = block_ends[start_idx]
         block = "\n".join(lines[start_idx : end_idx + 1])
 
         raw_calls = FUNCTION_CALL_RE.findall(block)
-        calls = [c for c in raw_calls if c not in KEYWORDS]
-        calls = ordered_unique(calls)
+        direct_counts = Counter(c for c in raw_calls if c not in KEYWORDS)
+        calls = ordered_unique([c for c in raw_calls if c not in KEYWORDS])
 
         custom_calls = [c for c in calls if c in custom_functions and c != "observeEvent"]
         important_calls = [c for c in calls if c in IMPORTANT_CALLS]
         key_calls = ordered_unique(custom_calls + important_calls)[:10]
 
-        effects = side_effects_from_calls(calls)
+        reached: set[str] = set()
+        for c in custom_calls:
+            reached |= reachability.get(c, frozenset())
+        reached_calls = set(calls)
+        for name in reached:
+            reached_calls.update(call_graph[name])
+        costs = transitive_costs(direct_counts, costs_by_function)
+
+        direct_effects = side_effects_from_calls(calls)
+        effects = side_effects_from_calls(sorted(reached_calls))
         other_inputs = extract_other_inputs(block, input_id)
         sql_targets = extract_sql_targets(block)
+        sql_statements = extract_sql_statements(block, i)
+        reached_sql = [st for name in sorted(reached) for st in function_sql.get(name, [])]
+        sql_statements.extend(reached_sql)
+        reached_sql_targets = [
+            target
+            for target in extract_sql_targets("\n".join(st["sql"] for st in reached_sql))
+            if target not in sql_targets
+        ]
         notif_messages = extract_notification_messages(block)
 
         button_meta = action_buttons.get(input_id, {})
@@ -288,73 +674,698 @@ def collect_handlers(
             input_id=input_id,
             label=str(button_meta.get("label", "")),
             calls=key_calls,
-            effects=effects,
+            effects=direct_effects,
         )
-        handlers.append(
+        yield {
+            "input_id": input_id,
+            "button_line": button_meta.get("line", "-"),
+            "button_label": button_meta.get("label", ""),
+            "handler_line": i,
+            "handler_end_line": end_idx + 1,
+            "key_calls": key_calls,
+            "reached_functions": sorted(reached),
+            "transitive_costs": costs,
+            "side_effects": effects,
+            "other_inputs": other_inputs,
+            "sql_targets": sql_targets,
+            "reached_sql_targets": reached_sql_targets,
+            "sql_statements": ordered_unique_by(sql_statements, lambda st: (st["line"], st["sql"])),
+            "notification_messages": notif_messages,
+            "purpose": purpose,
+        }
+
+
+def collect_handlers(
+    lines: list[str],
+    action_buttons: dict[str, dict[str, str | int]],
+    custom_functions: set[str],
+    call_graph: dict[str, Counter] | None = None,
+    block_ends: list[int] | None = None,
+) -> list[dict]:
+    return list(iter_handlers(lines, action_buttons, custom_functions, call_graph, block_ends))
+
+
+def strip_isolated(text: str) -> str:
+    """Drop isolate(...) segments; reads inside them do not create dependencies."""
+    out = []
+    pos = 0
+    while True:
+        start = text.find("isolate(", pos)
+        if start < 0:
+            out.append(text[pos:])
+            return "".join(out)
+        out.append(text[pos:start])
+        depth = 0
+        idx = start + len("isolate")
+        while idx < len(text):
+            if text[idx] == "(":
+                depth += 1
+            elif text[idx] == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+            idx += 1
+        pos = idx + 1
+
+
+def collect_reactive_state(lines: list[str]) -> dict[str, set[str]]:
+    state: dict[str, set[str]] = {"reactive": set(), "reactiveVal": set(), "reactiveValues": set()}
+    for line in lines:
+        m = REACTIVE_DEF_RE.search(line)
+        if m:
+            state[m.group(2)].add(m.group(1))
+    return state
+
+
+def reactive_access_scanner(state: dict[str, set[str]]):
+    """
+    Build a function returning (reads, writes) of reactive nodes in a piece of
+    code. Node ids: `input$x`, `name()` for reactive/reactiveVal, `rv$field` for
+    reactiveValues fields.
+    """
+    callables = sorted(state["reactive"] | state["reactiveVal"], key=len, reverse=True)
+    call_re = (
+        re.compile(r"(?<![A-Za-z0-9_.$])(" + "|".join(map(re.escape, callables)) + r")\(\s*(\))?")
+        if callables
+        else None
+    )
+    values = sorted(state["reactiveValues"], key=len, reverse=True)
+    field_re = (
+        re.compile(
+            r"(?<![A-Za-z0-9_.$])(" + "|".join(map(re.escape, values)) + r")\$([A-Za-z0-9_.]+)(\s*<<?-)?"
+        )
+        if values
+        else None
+    )
+
+    def scan(text: str) -> tuple[set[str], set[str]]:
+        reads = {f"input${x}" for x in INPUT_READ_RE.findall(text)}
+        writes: set[str] = set()
+        if call_re:
+            for m in call_re.finditer(text):
+                node = f"{m.group(1)}()"
+                if m.group(2) or m.group(1) in state["reactive"]:
+                    reads.add(node)
+                else:
+                    writes.add(node)
+        if field_re:
+            for m in field_re.finditer(text):
+                node = f"{m.group(1)}${m.group(2)}"
+                (writes if m.group(3) else reads).add(node)
+        return reads, writes
+
+    return scan
+
+
+def collect_reactive_consumers(lines: list[str], block_ends: list[int]) -> list[dict]:
+    """
+    Find reactive(), observe(), observeEvent() and output$x <- render*() blocks.
+    `parent` is the id of the innermost consumer whose block contains this one:
+    re-running the parent re-creates (and so invalidates) the child.
+    """
+    consumers = []
+    stack: list[dict] = []
+    for idx, line in enumerate(lines):
+        while stack and stack[-1]["end_line"] < idx + 1:
+            stack.pop()
+        if line.lstrip().startswith("#"):
+            continue
+        consumer = None
+        reactive_def = REACTIVE_DEF_RE.search(line)
+        output_def = OUTPUT_DEF_RE.search(line)
+        observe = OBSERVE_RE.search(line)
+        observe_event = OBSERVE_EVENT_ANY_RE.search("\n".join(lines[idx : idx + 4]))
+        if reactive_def and reactive_def.group(2) == "reactive":
+            consumer = {
+                "id": f"{reactive_def.group(1)}()",
+                "kind": "reactive",
+                "start": reactive_def.start(2),
+            }
+        elif output_def:
+            consumer = {
+                "id": f"output${output_def.group(1)}",
+                "kind": "output",
+                "start": output_def.start(2),
+            }
+        elif observe:
+            consumer = {"id": f"observe@{idx + 1}", "kind": "observer", "start": observe.start()}
+        elif observe_event and observe_event.start() < len(line):
+            event = re.sub(r"\s+", " ", observe_event.group(1))
+            consumer = {
+                "id": f"observeEvent({event})@{idx + 1}",
+                "kind": "handler",
+                "start": observe_event.start(),
+                "event": event,
+            }
+        if consumer is None:
+            continue
+        end_idx = expression_end(lines, idx, block_ends, consumer.pop("start"))
+        consumer["line"] = idx + 1
+        consumer["end_line"] = end_idx + 1
+        consumer["parent"] = stack[-1]["id"] if stack else None
+        consumers.append(consumer)
+        stack.append(consumer)
+    return consumers
+
+
+def build_reactive_graph(
+    lines: list[str],
+    call_graph: dict[str, Counter],
+    block_ends: list[int],
+) -> dict:
+    """
+    Reactive dependency graph of the app: edges go from a source (input,
+    reactiveVal, reactiveValues field, reactive) to every consumer that reads it,
+    and from a consumer to every source it writes. Reads/writes inside custom
+    helpers count for the consumer that calls them.
+    """
+    state = collect_reactive_state(lines)
+    scan = reactive_access_scanner(state)
+    work_graph = without_setup_helpers(call_graph)
+    reachability = compute_reachability(work_graph)
+    costs_by_function = function_costs(work_graph)
+
+    fn_reads: dict[str, set[str]] = {name: set() for name in call_graph}
+    fn_writes: dict[str, set[str]] = {name: set() for name in call_graph}
+    for name, line in iter_function_lines(lines, block_ends):
+        reads, writes = scan(strip_isolated(line))
+        fn_reads[name] |= reads
+        fn_writes[name] |= writes
+
+    nodes: dict[str, dict] = {}
+    edges: dict[str, Counter] = {}
+
+    def add_edge(src: str, dst: str) -> None:
+        edges.setdefault(src, Counter())[dst] += 1
+        edges.setdefault(dst, Counter())
+
+    for kind, names in state.items():
+        for name in names:
+            if kind != "reactiveValues":
+                nodes[f"{name}()"] = {"kind": kind}
+
+    for c in collect_reactive_consumers(lines, block_ends):
+        block = "\n".join(lines[c["line"] - 1 : c["end_line"]])
+        raw_calls = Counter(x for x in FUNCTION_CALL_RE.findall(block) if x not in KEYWORDS)
+        reached: set[str] = set()
+        for call in raw_calls:
+            if call in work_graph:
+                reached |= reachability[call]
+        costs = transitive_costs(raw_calls, costs_by_function)
+
+        if c["kind"] == "handler":
+            reads, _ = scan(c["event"])
+            _, writes = scan(block)
+        else:
+            reads, writes = scan(strip_isolated(block))
+            for name in reached:
+                reads |= fn_reads[name]
+        for name in reached:
+            writes |= fn_writes[name]
+
+        nodes[c["id"]] = {
+            "kind": c["kind"],
+            "line": c["line"],
+            "end_line": c["end_line"],
+            "queries_db": costs["db_reads"] + costs["db_writes"] > 0,
+            "db_reads": costs["db_reads"],
+            "db_writes": costs["db_writes"],
+        }
+        edges.setdefault(c["id"], Counter())
+        for src in reads - {c["id"]}:
+            add_edge(src, c["id"])
+        for dst in writes - {c["id"]}:
+            add_edge(c["id"], dst)
+        if c["parent"]:
+            add_edge(c["parent"], c["id"])
+
+    for node in edges:
+        if node not in nodes:
+            kind = "input" if node.startswith("input$") else "reactiveValues"
+            nodes[node] = {"kind": kind}
+    return {"nodes": nodes, "edges": edges}
+
+
+def reactive_fanout(graph: dict) -> dict[str, dict]:
+    """
+    For every input, reactiveVal and reactiveValues field: the consumers that
+    re-run when it changes, following writes made by re-run observers.
+    """
+    nodes = graph["nodes"]
+    reach = compute_reachability(graph["edges"])
+    fanout = {}
+    for source, meta in sorted(nodes.items()):
+        if meta["kind"] not in ("input", "reactiveVal", "reactiveValues"):
+            continue
+        invalidated = sorted(
+            n for n in reach.get(source, ()) if "queries_db" in nodes[n]
+        )
+        db_querying = [n for n in invalidated if nodes[n]["queries_db"]]
+        fanout[source] = {
+            "kind": meta["kind"],
+            "invalidated": invalidated,
+            "db_querying": db_querying,
+            "db_reads": sum(nodes[n]["db_reads"] for n in invalidated),
+        }
+    return fanout
+
+
+def button_fanout(handlers: list[dict], fanout: dict[str, dict], nodes: dict[str, dict]) -> list[dict]:
+    """Fan-out rows for every handled input, heaviest DB invalidation first."""
+    rows = []
+    for input_id in ordered_unique([h["input_id"] for h in handlers]):
+        entry = fanout.get(f"input${input_id}")
+        if not entry:
+            continue
+        kinds = Counter(nodes[n]["kind"] for n in entry["invalidated"])
+        rows.append(
             {
                 "input_id": input_id,
-                "button_line": button_meta.get("line", "-"),
-                "button_label": button_meta.get("label", ""),
-                "handler_line": i,
-                "handler_end_line": end_idx + 1,
-                "key_calls": key_calls,
-                "side_effects": effects,
-                "other_inputs": other_inputs,
-                "sql_targets": sql_targets,
-                "notification_messages": notif_messages,
-                "purpose": purpose,
+                "handlers": kinds["handler"],
+                "reactives": kinds["reactive"],
+                "outputs": kinds["output"],
+                "observers": kinds["observer"],
+                "db_querying": entry["db_querying"],
+                "db_reads": entry["db_reads"],
             }
         )
-    return handlers
+    return sorted(
+        rows,
+        key=lambda r: (
+            -len(r["db_querying"]),
+            -(r["reactives"] + r["outputs"] + r["observers"]),
+            r["input_id"],
+        ),
+    )
+
+
+def write_reactive_json(app_path: Path, graph: dict, fanout: dict[str, dict], out_path: Path) -> None:
+    payload = {
+        "source": str(app_path),
+        "generated": dt.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "nodes": graph["nodes"],
+        "edges": sorted([src, dst] for src, dsts in graph["edges"].items() for dst in dsts),
+        "fanout": fanout,
+    }
+    out_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
 
 
-def build_mermaid(handlers: list[dict]) -> str:
-    # Keep graph readable: focus on core project workflow buttons + notification flow.
-    selected = [h for h in handlers if h["input_id"] in CORE_WORKFLOW_IDS]
+def write_map_json(
+    app_path: Path,
+    action_buttons: dict[str, dict[str, str | int]],
+    handlers: Iterable[dict],
+    out_path: Path,
+) -> int:
+    """
+    Stream the map as JSON: the header and buttons first, then one handler
+    object per line inside "handlers", written as each handler is analyzed.
+    Returns the number of handlers written.
+    """
+    header = {
+        "source": str(app_path),
+        "generated": dt.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "buttons": action_buttons,
+    }
+    count = 0
+    with out_path.open("w", encoding="utf-8") as handle:
+        handle.write(json.dumps(header)[:-1] + ', "handlers": [\n')
+        for h in handlers:
+            if count:
+                handle.write(",\n")
+            handle.write(json.dumps(h))
+            count += 1
+        handle.write("\n]}\n")
+    return count
+
+
+MAP_SQLITE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE buttons (input_id TEXT PRIMARY KEY, line INTEGER, label TEXT);
+CREATE TABLE handlers (
+    id INTEGER PRIMARY KEY,
+    input_id TEXT NOT NULL,
+    handler_line INTEGER NOT NULL,
+    handler_end_line INTEGER NOT NULL,
+    purpose TEXT,
+    db_reads INTEGER NOT NULL,
+    db_writes INTEGER NOT NULL,
+    emails INTEGER NOT NULL,
+    connections INTEGER NOT NULL
+);
+CREATE TABLE calls (handler_id INTEGER NOT NULL REFERENCES handlers(id), function TEXT NOT NULL, kind TEXT NOT NULL);
+CREATE TABLE inputs (handler_id INTEGER NOT NULL REFERENCES handlers(id), input_id TEXT NOT NULL);
+CREATE TABLE sql_targets (
+    handler_id INTEGER NOT NULL REFERENCES handlers(id),
+    operation TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE TABLE sql_statements (
+    handler_id INTEGER NOT NULL REFERENCES handlers(id),
+    function TEXT,
+    line INTEGER,
+    sql TEXT NOT NULL
+);
+CREATE TABLE side_effects (handler_id INTEGER NOT NULL REFERENCES handlers(id), effect TEXT NOT NULL);
+"""
+
+# Created after the bulk insert; every child table is looked up both by handler and by value.
+MAP_SQLITE_INDEXES = """
+CREATE INDEX idx_handlers_input ON handlers(input_id);
+CREATE INDEX idx_calls_function ON calls(function, kind);
+CREATE INDEX idx_calls_handler ON calls(handler_id);
+CREATE INDEX idx_inputs_input ON inputs(input_id);
+CREATE INDEX idx_inputs_handler ON inputs(handler_id);
+CREATE INDEX idx_sql_targets_table ON sql_targets(table_name, operation);
+CREATE INDEX idx_sql_targets_handler ON sql_targets(handler_id);
+CREATE INDEX idx_sql_statements_handler ON sql_statements(handler_id);
+CREATE INDEX idx_side_effects_effect ON side_effects(effect);
+CREATE INDEX idx_side_effects_handler ON side_effects(handler_id);
+"""
+
+
+def write_map_sqlite(
+    app_path: Path,
+    action_buttons: dict[str, dict[str, str | int]],
+    handlers: Iterable[dict],
+    out_path: Path,
+) -> int:
+    """
+    Write the map to an indexed SQLite file, e.g. all handlers that write
+    projects, in their own block or through a helper they reach:
+
+        SELECT DISTINCT h.input_id FROM handlers h JOIN sql_targets t ON t.handler_id = h.id
+        WHERE t.table_name = 'projects' AND t.operation IN ('INSERT', 'UPDATE', 'DELETE');
+
+    sql_targets.kind is 'direct' (handler block) or 'reached' (helpers only),
+    like calls.kind.
+
+    Built in a temp file and moved into place, so readers never see a partial map.
+    Returns the number of handlers written.
+    """
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    count = 0
+    try:
+        conn.executescript(MAP_SQLITE_SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [("source", str(app_path)), ("generated", dt.datetime.now().strftime("%Y-%m-%d %H:%M"))],
+            )
+            conn.executemany(
+                "INSERT INTO buttons (input_id, line, label) VALUES (?, ?, ?)",
+                [(btn_id, meta["line"], meta["label"]) for btn_id, meta in action_buttons.items()],
+            )
+            for h in handlers:
+                costs = h["transitive_costs"]
+                handler_id = conn.execute(
+                    "INSERT INTO handlers (input_id, handler_line, handler_end_line, purpose, "
+                    "db_reads, db_writes, emails, connections) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        h["input_id"],
+                        h["handler_line"],
+                        h["handler_end_line"],
+                        h["purpose"],
+                        costs["db_reads"],
+                        costs["db_writes"],
+                        costs["emails"],
+                        costs["connections"],
+                    ),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO calls (handler_id, function, kind) VALUES (?, ?, ?)",
+                    [(handler_id, fn, "key") for fn in h["key_calls"]]
+                    + [(handler_id, fn, "reached") for fn in h["reached_functions"]],
+                )
+                conn.executemany(
+                    "INSERT INTO inputs (handler_id, input_id) VALUES (?, ?)",
+                    [(handler_id, input_id) for input_id in h["other_inputs"]],
+                )
+                conn.executemany(
+                    "INSERT INTO sql_targets (handler_id, operation, table_name, kind) VALUES (?, ?, ?, ?)",
+                    [(handler_id, *target.split(" ", 1), "direct") for target in h["sql_targets"]]
+                    + [(handler_id, *target.split(" ", 1), "reached") for target in h["reached_sql_targets"]],
+                )
+                conn.executemany(
+                    "INSERT INTO sql_statements (handler_id, function, line, sql) VALUES (?, ?, ?, ?)",
+                    [(handler_id, st["fn"], st["line"], st["sql"]) for st in h["sql_statements"]],
+                )
+                conn.executemany(
+                    "INSERT INTO side_effects (handler_id, effect) VALUES (?, ?)",
+                    [(handler_id, effect) for effect in h["side_effects"]],
+                )
+                count += 1
+        conn.executescript(MAP_SQLITE_INDEXES)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    tmp_path.replace(out_path)
+    return count
+
+
+INSTRUMENT_PRELUDE = r'''# ---- Timing instrumentation (generated by generate_button_function_map.py --instrument-out) ----
+# Staging only. Handler and query timings are appended as JSON lines to BCF_TIMING_LOG;
+# analyze them with scripts/analyze_handler_timings.py. Line numbers refer to the original app.R.
+if (!identical(Sys.getenv("BCF_TIMING_ENABLED"), "1")) {
+  stop("Instrumented build of app.R: set BCF_TIMING_ENABLED=1 (staging only).")
+}
+.bcf_timing <- new.env(parent = emptyenv())
+.bcf_timing$log_path <- Sys.getenv("BCF_TIMING_LOG", "handler_timings.jsonl")
+.bcf_timing$handler <- NA_character_
+.bcf_timing$current <- NA_integer_
+.bcf_timing$invocation <- 0L
+
+.bcf_now_ms <- function() as.numeric(Sys.time()) * 1000
+
+.bcf_log <- function(record) {
+  session <- shiny::getDefaultReactiveDomain()
+  record$session <- if (is.null(session)) NA_character_ else session$token
+  record$ts <- format(Sys.time(), "%Y-%m-%dT%H:%M:%OS3")
+  cat(
+    jsonlite::toJSON(record, auto_unbox = TRUE, na = "null", digits = NA), "\n",
+    sep = "", file = .bcf_timing$log_path, append = TRUE
+  )
+}
+
+.bcf_timed_handler <- function(handler_id, src_line, expr) {
+  previous_handler <- .bcf_timing$handler
+  previous_invocation <- .bcf_timing$current
+  .bcf_timing$invocation <- .bcf_timing$invocation + 1L
+  invocation <- .bcf_timing$invocation
+  .bcf_timing$handler <- handler_id
+  .bcf_timing$current <- invocation
+  started <- .bcf_now_ms()
+  on.exit({
+    .bcf_log(list(
+      event = "handler", handler = handler_id, line = src_line,
+      invocation = invocation, elapsed_ms = .bcf_now_ms() - started
+    ))
+    .bcf_timing$handler <- previous_handler
+    .bcf_timing$current <- previous_invocation
+  }, add = TRUE)
+  force(expr)
+}
+
+.bcf_timed_db <- function(fn_name, src_line, ...) {
+  started <- .bcf_now_ms()
+  on.exit(.bcf_log(list(
+    event = "query", fn = fn_name, line = src_line, handler = .bcf_timing$handler,
+    invocation = .bcf_timing$current, elapsed_ms = .bcf_now_ms() - started
+  )), add = TRUE)
+  if (identical(fn_name, "dbExecute")) DBI::dbExecute(...) else DBI::dbGetQuery(...)
+}
+# ---- End timing instrumentation ----
+
+'''
+
+
+def handler_body_span(text: str, start: int) -> tuple[int, int] | None:
+    """
+    Character span (open brace, matching close brace) of the handler body of the
+    observeEvent( call starting at `start`, or None if the handler is not a
+    braced block passed as the second argument.
+    """
+    pos = text.index("(", start)
+    depth = 0
+    while pos < len(text):
+        ch = text[pos]
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+            if depth == 0:
+                return None
+        elif ch == "," and depth == 1:
+            break
+        pos += 1
+    m = re.compile(r"\s*\{").match(text, pos + 1)
+    if not m:
+        return None
+    open_pos = m.end() - 1
+    depth = 0
+    for idx in range(open_pos, len(text)):
+        if text[idx] == "{":
+            depth += 1
+        elif text[idx] == "}":
+            depth -= 1
+            if depth == 0:
+                return open_pos, idx
+    return None
 
-    lines = ["graph LR"]
-    lines.append('  classDef btn fill:#e8f0fe,stroke:#356ac3,color:#1b3f7f,stroke-width:1px;')
-    lines.append('  classDef evt fill:#f0f7e8,stroke:#5b8f29,color:#2f5c12,stroke-width:1px;')
-    lines.append('  classDef fn fill:#fff3e6,stroke:#cc7a00,color:#7a4a00,stroke-width:1px;')
-    lines.append('  classDef fx fill:#f5e9ff,stroke:#7b49b0,color:#4d2b73,stroke-width:1px;')
 
+def instrument_app(text: str, lines: list[str], block_ends: list[int]) -> tuple[str, int, int]:
+    """
+    Return an instrumented copy of app.R: every observeEvent body runs inside
+    .bcf_timed_handler() and every dbGetQuery()/dbExecute() call goes through
+    .bcf_timed_db(). Edits stay on the original lines. Also returns the number of
+    wrapped handlers and DB calls.
+    """
+    line_offsets = [0]
+    for line in lines:
+        line_offsets.append(line_offsets[-1] + len(line) + 1)
+
+    edits: list[tuple[int, int, str]] = []
+    handlers = 0
+    for consumer in collect_reactive_consumers(lines, block_ends):
+        if consumer["kind"] != "handler":
+            continue
+        line_start = line_offsets[consumer["line"] - 1]
+        call_start = text.index("observeEvent(", line_start)
+        span = handler_body_span(text, call_start)
+        if span is None:
+            continue
+        event = consumer["event"]
+        input_event = re.fullmatch(r"input\$([A-Za-z0-9_]+)", event)
+        handler_id = input_event.group(1) if input_event else event
+        open_pos, close_pos = span
+        edits.append((open_pos + 1, open_pos + 1, f" .bcf_timed_handler({json.dumps(handler_id)}, {consumer['line']}L, {{"))
+        edits.append((close_pos, close_pos, "}) "))
+        handlers += 1
+
+    db_calls = 0
+    for idx, line in enumerate(lines):
+        if line.lstrip().startswith("#"):
+            continue
+        for m in DB_CALL_RE.finditer(line):
+            pos = line_offsets[idx] + m.start()
+            sep = " " if line[m.end() :].strip() else ""
+            edits.append((pos, line_offsets[idx] + m.end(), f'.bcf_timed_db("{m.group(1)}", {idx + 1}L,{sep}'))
+            db_calls += 1
+
+    out = []
+    cursor = len(text)
+    for start, end, replacement in sorted(edits, key=lambda e: (e[0], e[1]), reverse=True):
+        out.append(text[end:cursor])
+        out.append(replacement)
+        cursor = start
+    out.append(text[:cursor])
+    return INSTRUMENT_PRELUDE + "".join(reversed(out)), handlers, db_calls
+
+
+MERMAID_CLASS_DEFS = [
+    "  classDef btn fill:#e8f0fe,stroke:#356ac3,color:#1b3f7f,stroke-width:1px;",
+    "  classDef evt fill:#f0f7e8,stroke:#5b8f29,color:#2f5c12,stroke-width:1px;",
+    "  classDef fn fill:#fff3e6,stroke:#cc7a00,color:#7a4a00,stroke-width:1px;",
+    "  classDef fx fill:#f5e9ff,stroke:#7b49b0,color:#4d2b73,stroke-width:1px;",
+    "  classDef sql fill:#eef6f6,stroke:#2d7d7d,color:#1d5151,stroke-width:1px;",
+]
+
+# Checked in order, so the more specific prefixes come first.
+CLUSTER_PREFIXES = [
+    "confirm_delete_",
+    "confirm_",
+    "manage_",
+    "add_",
+    "edit_",
+    "update_",
+    "delete_",
+    "announcement_",
+    "ldap_",
+    "dev_",
+]
+
+
+def handler_cluster(input_id: str) -> str:
+    for prefix in CLUSTER_PREFIXES:
+        if input_id.startswith(prefix):
+            return f"{prefix}*"
+    return "other"
+
+
+def build_handler_mermaid(h: dict) -> str:
+    """Small diagram for one handler: button -> observeEvent -> key calls, side effects, SQL targets."""
+    lines = ["graph LR", *MERMAID_CLASS_DEFS]
+    bid = safe_mermaid_id(f"btn_{h['input_id']}")
+    hid = safe_mermaid_id(f"evt_{h['input_id']}_{h['handler_line']}")
+    lines.append(f'  {bid}["{h["input_id"]}"] --> {hid}["observeEvent @ {h["handler_line"]}"]')
+    lines.append(f"  class {bid} btn;")
+    lines.append(f"  class {hid} evt;")
+    for call in h["key_calls"][:6]:
+        fid = safe_mermaid_id(f"fn_{call}")
+        lines.append(f'  {hid} --> {fid}["{call}()"]')
+        lines.append(f"  class {fid} fn;")
+    for effect in h["side_effects"]:
+        xid = safe_mermaid_id(f"fx_{effect}")
+        lines.append(f'  {hid} --> {xid}["{effect}"]')
+        lines.append(f"  class {xid} fx;")
+    for target in h["sql_targets"][:6]:
+        sid = safe_mermaid_id(f"sql_{target}")
+        lines.append(f'  {hid} -.-> {sid}[("{target}")]')
+        lines.append(f"  class {sid} sql;")
+    return "\n".join(lines)
+
+
+def build_cluster_overview(handlers: list[dict]) -> str:
+    """
+    One node per handler prefix cluster, linked to the side effects of its
+    handlers (edge label = number of handlers with that effect). Stays small
+    however many handlers the app has; details are rendered per handler on demand.
+    """
+    clusters: dict[str, list[dict]] = {}
+    for h in handlers:
+        clusters.setdefault(handler_cluster(h["input_id"]), []).append(h)
+
+    lines = ["graph LR", *MERMAID_CLASS_DEFS]
     effect_nodes = {}
-    for h in selected:
-        bid = safe_mermaid_id(f"btn_{h['input_id']}")
-        hid = safe_mermaid_id(f"evt_{h['input_id']}_{h['handler_line']}")
-        blabel = h["input_id"]
-        hlabel = f"observeEvent @ {h['handler_line']}"
-        lines.append(f'  {bid}["{blabel}"] --> {hid}["{hlabel}"]')
-        lines.append(f"  class {bid} btn;")
-        lines.append(f"  class {hid} evt;")
-
-        for call in h["key_calls"][:4]:
-            fid = safe_mermaid_id(f"fn_{h['input_id']}_{call}")
-            lines.append(f'  {hid} --> {fid}["{call}()"]')
-            lines.append(f"  class {fid} fn;")
-
-        for effect in h["side_effects"]:
+    for cluster in sorted(clusters, key=lambda c: (c == "other", c)):
+        members = clusters[cluster]
+        cid = safe_mermaid_id(f"cluster_{cluster}")
+        lines.append(f'  {cid}["{cluster}<br/>{len(members)} handlers"]')
+        lines.append(f"  class {cid} btn;")
+        effect_counts = Counter(effect for h in members for effect in h["side_effects"])
+        for effect, count in sorted(effect_counts.items()):
             if effect not in effect_nodes:
                 effect_nodes[effect] = safe_mermaid_id(f"fx_{effect}")
                 lines.append(f'  {effect_nodes[effect]}["{effect}"]')
                 lines.append(f"  class {effect_nodes[effect]} fx;")
-            lines.append(f"  {hid} --> {effect_nodes[effect]}")
-
-    if not selected:
-        lines.append('  A["No core handlers found"]')
+            lines.append(f"  {cid} -->|{count}| {effect_nodes[effect]}")
+    if not clusters:
+        lines.append('  A["No handlers found"]')
     return "\n".join(lines)
 
 
+def cost_ranking(handlers: list[dict]) -> list[dict]:
+    """Handlers ordered by the total downstream work one click triggers."""
+    return sorted(
+        handlers,
+        key=lambda h: (-sum(h["transitive_costs"].values()), h["handler_line"], h["input_id"]),
+    )
+
+
 def render_qmd(
     app_path: Path,
     handlers: list[dict],
     action_buttons: dict[str, dict[str, str | int]],
     out_path: Path,
+    fanout_rows: list[dict] | None = None,
 ) -> None:
     now = dt.datetime.now().strftime("%Y-%m-%d %H:%M")
     mapped_buttons = {h["input_id"] for h in handlers if h["button_line"] != "-"}
     unmapped_buttons = sorted(set(action_buttons) - mapped_buttons)
-    mermaid = build_mermaid(handlers)
+    overview = build_cluster_overview(handlers)
+    handler_diagrams = {h["input_id"]: build_handler_mermaid(h) for h in handlers}
     summary_handlers = sorted(handlers, key=lambda x: (x["handler_line"], x["input_id"]))
     core_summary = [h for h in summary_handlers if h["input_id"] in CORE_WORKFLOW_IDS]
 
@@ -366,7 +1377,7 @@ def render_qmd(
     lines.append("  warning: false")
     lines.append("format:")
     lines.append("  html:")
-    lines.append("    mermaid-format: svg")
+    lines.append("    mermaid-format: js")
     lines.append("---")
     lines.append("")
     lines.append("# Overview")
@@ -401,30 +1412,68 @@ def render_qmd(
     lines.append("#diagram-pane { border:1px solid #d8dee6; border-radius:8px; padding:8px; overflow:auto; max-height:80vh; background:#ffffff; }")
     lines.append("#diagram-pane svg { display:block; width:auto !important; max-width:none !important; height:auto !important; }")
     lines.append(".summary-table-wrap { max-height:80vh; overflow:auto; border:1px solid #d8dee6; border-radius:8px; padding:8px; background:#ffffff; }")
+    lines.append(".handler-row { cursor:pointer; }")
+    lines.append(".handler-row.active td { background:#eef3f8; }")
+    lines.append("#handler-diagram-title { font-weight:600; color:#2f3b4a; }")
     lines.append("</style>")
+    lines.append("<script type=\"application/json\" id=\"handler-diagrams\">")
+    lines.append(json.dumps(handler_diagrams).replace("</", "<\\/"))
+    lines.append("</script>")
     lines.append("<script>")
     lines.append("document.addEventListener('DOMContentLoaded', function () {")
     lines.append("  const pane = document.getElementById('diagram-pane');")
     lines.append("  if (!pane) return;")
-    lines.append("  const svg = pane.querySelector('svg');")
+    lines.append("  const diagrams = JSON.parse(document.getElementById('handler-diagrams').textContent);")
+    lines.append("  const overview = document.getElementById('diagram-overview');")
+    lines.append("  const detail = document.getElementById('handler-diagram');")
+    lines.append("  const title = document.getElementById('handler-diagram-title');")
     lines.append("  const zoomLabel = document.getElementById('diagram-zoom-level');")
     lines.append("  const zoomInBtn = document.getElementById('diagram-zoom-in');")
     lines.append("  const zoomOutBtn = document.getElementById('diagram-zoom-out');")
     lines.append("  const zoomResetBtn = document.getElementById('diagram-zoom-reset');")
-    lines.append("  if (!svg) { if (zoomLabel) zoomLabel.textContent = 'n/a'; return; }")
+    lines.append("  const overviewBtn = document.getElementById('diagram-overview-btn');")
     lines.append("  let zoom = 1.0;")
+    lines.append("  let renderSeq = 0;")
     lines.append("  const minZoom = 0.30;")
     lines.append("  const maxZoom = 3.00;")
     lines.append("  const step = 0.10;")
     lines.append("  function applyZoom() {")
+    lines.append("    const svg = (detail.hidden ? overview : detail).querySelector('svg');")
+    lines.append("    if (zoomLabel) zoomLabel.textContent = `${Math.round(zoom * 100)}%`;")
+    lines.append("    if (!svg) return;")
     lines.append("    svg.style.transformOrigin = 'top left';")
     lines.append("    svg.style.transform = `scale(${zoom})`;")
-    lines.append("    if (zoomLabel) zoomLabel.textContent = `${Math.round(zoom * 100)}%`;")
     lines.append("  }")
+    lines.append("  function showOverview() {")
+    lines.append("    detail.hidden = true;")
+    lines.append("    overview.hidden = false;")
+    lines.append("    title.textContent = 'Overview by handler prefix (click a table row for details)';")
+    lines.append("    document.querySelectorAll('.handler-row.active').forEach(function (r) { r.classList.remove('active'); });")
+    lines.append("    applyZoom();")
+    lines.append("  }")
+    lines.append("  async function showHandler(id, row) {")
+    lines.append("    if (!diagrams[id] || !window.mermaid) return;")
+    lines.append("    renderSeq += 1;")
+    lines.append("    const { svg } = await window.mermaid.render(`handler-diagram-svg-${renderSeq}`, diagrams[id]);")
+    lines.append("    detail.innerHTML = svg;")
+    lines.append("    overview.hidden = true;")
+    lines.append("    detail.hidden = false;")
+    lines.append("    title.textContent = id;")
+    lines.append("    document.querySelectorAll('.handler-row.active').forEach(function (r) { r.classList.remove('active'); });")
+    lines.append("    row.classList.add('active');")
+    lines.append("    applyZoom();")
+    lines.append("  }")
+    lines.append("  document.querySelectorAll('table tbody tr').forEach(function (row) {")
+    lines.append("    const code = row.querySelector('td code');")
+    lines.append("    if (!code || !diagrams[code.textContent]) return;")
+    lines.append("    row.classList.add('handler-row');")
+    lines.append("    row.addEventListener('click', function () { showHandler(code.textContent, row); });")
+    lines.append("  });")
     lines.append("  if (zoomInBtn) zoomInBtn.addEventListener('click', function () { zoom = Math.min(maxZoom, +(zoom + step).toFixed(2)); applyZoom(); });")
     lines.append("  if (zoomOutBtn) zoomOutBtn.addEventListener('click', function () { zoom = Math.max(minZoom, +(zoom - step).toFixed(2)); applyZoom(); });")
     lines.append("  if (zoomResetBtn) zoomResetBtn.addEventListener('click', function () { zoom = 1.0; applyZoom(); });")
-    lines.append("  applyZoom();")
+    lines.append("  if (overviewBtn) overviewBtn.addEventListener('click', showOverview);")
+    lines.append("  showOverview();")
     lines.append("});")
     lines.append("</script>")
     lines.append("```")
@@ -435,22 +1484,25 @@ def render_qmd(
     lines.append("")
     lines.append("```{=html}")
     lines.append("<div class=\"diagram-toolbar\">")
+    lines.append("  <button id=\"diagram-overview-btn\" type=\"button\">Overview</button>")
     lines.append("  <button id=\"diagram-zoom-out\" type=\"button\">-</button>")
     lines.append("  <span id=\"diagram-zoom-level\" class=\"diagram-zoom-level\">100%</span>")
     lines.append("  <button id=\"diagram-zoom-in\" type=\"button\">+</button>")
     lines.append("  <button id=\"diagram-zoom-reset\" type=\"button\">Reset</button>")
     lines.append("</div>")
+    lines.append("<div id=\"handler-diagram-title\"></div>")
     lines.append("<div id=\"diagram-pane\">")
+    lines.append("<div id=\"handler-diagram\" hidden></div>")
+    lines.append("<div id=\"diagram-overview\">")
     lines.append("```")
     lines.append("")
     lines.append("```{mermaid}")
-    lines.append("%%| fig-width: 22")
-    lines.append("%%| fig-height: 28")
-    lines.append(mermaid)
+    lines.append(overview)
     lines.append("```")
     lines.append("")
     lines.append("```{=html}")
     lines.append("</div>")
+    lines.append("</div>")
     lines.append("```")
     lines.append(":::")
     lines.append("::: {.column width=\"60%\"}")
@@ -516,6 +1568,37 @@ def render_qmd(
             f"| `{h['input_id']}` | {label} | {h['purpose']} | {h['button_line']} | {h['handler_line']} | {block} | {inputs} | {key_calls} | {sidefx} | {sql} |"
         )
     lines.append("")
+    lines.append("## Transitive Cost per Button")
+    lines.append("")
+    lines.append(
+        "Counts call sites in the handler plus, for every custom helper it calls, the helper's own transitive count times the number of call sites (a helper called twice counts twice). `Connections` counts `dbConnect()` calls, including those inside `get_db_connection()`; the idempotent schema migration and seed helpers (`ensure_*`, `migrate_*`, `seed_*`) that `get_db_connection()` and some loaders run on every call are not counted."
+    )
+    lines.append("")
+    lines.append("| Button ID | DB reads | DB writes | Emails | Connections | Helpers reached |")
+    lines.append("|---|---:|---:|---:|---:|---:|")
+    for h in cost_ranking(handlers):
+        c = h["transitive_costs"]
+        lines.append(
+            f"| `{h['input_id']}` | {c['db_reads']} | {c['db_writes']} | {c['emails']} | {c['connections']} | {len(h['reached_functions'])} |"
+        )
+    lines.append("")
+    if fanout_rows is not None:
+        lines.append("## Reactive Invalidation Fan-out")
+        lines.append("")
+        lines.append(
+            "What re-runs when the input changes: handlers triggered, then every `reactive()`, `render*()` output and `observe()` invalidated through the reactiveVals/reactiveValues those handlers write (followed transitively). `DB nodes` are invalidated nodes that query the database."
+        )
+        lines.append("")
+        lines.append("| Button ID | Handlers | Reactives | Outputs | Observers | DB nodes | DB reads | DB-querying nodes |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|---|")
+        for r in fanout_rows:
+            db_nodes = ", ".join(f"`{n}`" for n in r["db_querying"][:4]) if r["db_querying"] else "-"
+            if len(r["db_querying"]) > 4:
+                db_nodes += f", ... (+{len(r['db_querying']) - 4})"
+            lines.append(
+                f"| `{r['input_id']}` | {r['handlers']} | {r['reactives']} | {r['outputs']} | {r['observers']} | {len(r['db_querying'])} | {r['db_reads']} | {db_nodes} |"
+            )
+        lines.append("")
     lines.append("## Buttons Without Direct observeEvent(input$...) Handler")
     lines.append("")
     if unmapped_buttons:
@@ -529,6 +1612,213 @@ def render_qmd(
     out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
+HISTORY_CACHE_VERSION = 2
+HISTORY_CSV_FIELDS = [
+    "commit",
+    "timestamp",
+    "blob",
+    "input_id",
+    "handler_line",
+    "block_lines",
+    "db_reads",
+    "db_writes",
+    "emails",
+    "connections",
+    "side_effects",
+    "sql_targets",
+]
+
+
+def analyze_app_text(text: str) -> dict:
+    """Per-handler metrics of one app.R version (the unit cached per blob in --history)."""
+    lines = text.splitlines()
+    action_buttons = collect_action_buttons(lines)
+    custom_functions = collect_custom_functions(lines)
+    block_ends = build_block_index(lines)
+    call_graph = build_call_graph(lines, custom_functions, block_ends)
+    handlers = {}
+    for h in collect_handlers(lines, action_buttons, custom_functions, call_graph, block_ends):
+        key = h["input_id"]
+        suffix = 2
+        while key in handlers:
+            key = f"{h['input_id']}#{suffix}"
+            suffix += 1
+        handlers[key] = {
+            "handler_line": h["handler_line"],
+            "block_lines": h["handler_end_line"] - h["handler_line"] + 1,
+            **h["transitive_costs"],
+            "side_effects": h["side_effects"],
+            "sql_targets": h["sql_targets"],
+        }
+    return {"buttons": len(action_buttons), "handlers": handlers}
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def app_revisions(app_path: Path, rev_range: str) -> tuple[Path, list[dict]]:
+    """
+    Commits in rev_range that touch app.R (oldest first) with the app.R blob
+    of each, resolved in one `git cat-file --batch-check` call.
+    """
+    repo = Path(git(app_path.parent, "rev-parse", "--show-toplevel").strip())
+    rel = app_path.resolve().relative_to(repo.resolve()).as_posix()
+    revisions = []
+    for line in git(repo, "rev-list", "--reverse", "--timestamp", rev_range, "--", rel).splitlines():
+        timestamp, commit = line.split()
+        revisions.append({"commit": commit, "timestamp": int(timestamp)})
+    query = "".join(f"{r['commit']}:{rel}\n" for r in revisions)
+    checked = subprocess.run(
+        ["git", "-C", str(repo), "cat-file", "--batch-check"],
+        input=query,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    out = []
+    for rev, line in zip(revisions, checked):
+        parts = line.split()
+        if len(parts) == 3 and parts[1] == "blob":
+            out.append({**rev, "blob": parts[0]})
+    return repo, out
+
+
+def iter_blobs(repo: Path, blobs: list[str]):
+    """Stream (sha, text) for each blob through a single `git cat-file --batch` process."""
+    proc = subprocess.Popen(
+        ["git", "-C", str(repo), "cat-file", "--batch"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        for sha in blobs:
+            proc.stdin.write(f"{sha}\n".encode())
+            proc.stdin.flush()
+            header = proc.stdout.readline().decode().split()
+            size = int(header[2])
+            data = proc.stdout.read(size + 1)[:size]
+            yield sha, data.decode("utf-8", errors="replace")
+    finally:
+        proc.stdin.close()
+        proc.wait()
+
+
+def history_cache(cache_dir: Path) -> Path:
+    """
+    Per-blob cache directory, keyed by HISTORY_CACHE_VERSION and a hash of this
+    script, so any change to the analysis invalidates earlier results.
+    """
+    digest = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+    cache = cache_dir / f"v{HISTORY_CACHE_VERSION}-{digest}"
+    cache.mkdir(parents=True, exist_ok=True)
+    return cache
+
+
+def analyze_history(app_path: Path, rev_range: str, cache_dir: Path, jobs: int | None) -> dict:
+    """
+    Metrics for every commit touching app.R. Each distinct blob is analyzed
+    once, in parallel, and cached as <history_cache()>/<blob>.json.
+    """
+    repo, revisions = app_revisions(app_path, rev_range)
+    cache = history_cache(cache_dir)
+
+    metrics: dict[str, dict] = {}
+    missing = []
+    for blob in ordered_unique([r["blob"] for r in revisions]):
+        cached = cache / f"{blob}.json"
+        if cached.exists():
+            metrics[blob] = json.loads(cached.read_text(encoding="utf-8"))
+        else:
+            missing.append(blob)
+
+    if missing:
+        # spawn: forked workers would inherit the cat-file pipes and keep it from exiting.
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(analyze_app_text, text): sha for sha, text in iter_blobs(repo, missing)}
+            for future in as_completed(futures):
+                sha = futures[future]
+                metrics[sha] = future.result()
+                (cache / f"{sha}.json").write_text(json.dumps(metrics[sha]), encoding="utf-8")
+
+    return {
+        "source": str(app_path),
+        "revisions": revisions,
+        "blobs": {r["blob"]: metrics[r["blob"]] for r in revisions},
+        "analyzed": len(missing),
+        "cached": len(metrics) - len(missing),
+    }
+
+
+def write_history(history: dict, out_prefix: Path) -> tuple[Path, Path]:
+    """Write <prefix>.json (revisions + metrics per blob) and <prefix>.csv (one row per commit and handler)."""
+    json_path = out_prefix.with_suffix(".json")
+    csv_path = out_prefix.with_suffix(".csv")
+    out_prefix.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(json.dumps(history, indent=2) + "\n", encoding="utf-8")
+    with csv_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=HISTORY_CSV_FIELDS)
+        writer.writeheader()
+        for rev in history["revisions"]:
+            for input_id, h in history["blobs"][rev["blob"]]["handlers"].items():
+                writer.writerow(
+                    {
+                        "commit": rev["commit"],
+                        "timestamp": dt.datetime.fromtimestamp(rev["timestamp"]).isoformat(),
+                        "blob": rev["blob"],
+                        "input_id": input_id,
+                        **{k: h[k] for k in HISTORY_CSV_FIELDS[4:10]},
+                        "side_effects": "; ".join(h["side_effects"]),
+                        "sql_targets": "; ".join(h["sql_targets"]),
+                    }
+                )
+    return json_path, csv_path
+
+
+def diff_metrics(old: dict, new: dict) -> list[str]:
+    """Human-readable changes in handlers, costs, side effects and SQL targets between two analyses."""
+    out = []
+    old_h, new_h = old["handlers"], new["handlers"]
+    for input_id in sorted(set(new_h) - set(old_h)):
+        out.append(f"+ {input_id} (line {new_h[input_id]['handler_line']})")
+    for input_id in sorted(set(old_h) - set(new_h)):
+        out.append(f"- {input_id}")
+    for input_id in sorted(set(old_h) & set(new_h)):
+        a, b = old_h[input_id], new_h[input_id]
+        changes = []
+        for metric in ["block_lines", *COST_CALLS]:
+            if a[metric] != b[metric]:
+                changes.append(f"{metric} {a[metric]} -> {b[metric]}")
+        for field in ("side_effects", "sql_targets"):
+            added = [x for x in b[field] if x not in a[field]]
+            removed = [x for x in a[field] if x not in b[field]]
+            changes += [f"+{field[:-1]} {x}" for x in added] + [f"-{field[:-1]} {x}" for x in removed]
+        if changes:
+            out.append(f"~ {input_id}: " + ", ".join(changes))
+    if old["buttons"] != new["buttons"]:
+        out.append(f"~ actionButton count {old['buttons']} -> {new['buttons']}")
+    return out
+
+
+def diff_revisions(app_path: Path, rev_a: str, rev_b: str, cache_dir: Path) -> list[str]:
+    repo = Path(git(app_path.parent, "rev-parse", "--show-toplevel").strip())
+    rel = app_path.resolve().relative_to(repo.resolve()).as_posix()
+    cache = history_cache(cache_dir)
+    results = []
+    for rev in (rev_a, rev_b):
+        blob = git(repo, "rev-parse", f"{rev}:{rel}").strip()
+        cached = cache / f"{blob}.json"
+        if cached.exists():
+            results.append(json.loads(cached.read_text(encoding="utf-8")))
+            continue
+        _, text = next(iter_blobs(repo, [blob]))
+        results.append(analyze_app_text(text))
+        cached.write_text(json.dumps(results[-1]), encoding="utf-8")
+    return diff_metrics(*results)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -539,23 +1829,138 @@ def main() -> int:
     parser.add_argument(
         "--out",
         default="/Users/yeroslaviz/Documents/Github/BCFNGS-project-management/Documentation/app-button-function-map.qmd",
-        help="Output QMD file path",
+        help="Output file path (for json/sqlite a .qmd suffix is swapped for .json/.sqlite)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["qmd", "json", "sqlite"],
+        default="qmd",
+        help="Report format: QMD page, streamed JSON, or indexed SQLite for queries",
+    )
+    parser.add_argument(
+        "--reactive-json",
+        default=None,
+        help="Output path for the reactive graph/fan-out JSON (default: <out stem>-reactive.json)",
+    )
+    parser.add_argument(
+        "--instrument-out",
+        default=None,
+        help="Write a timing-instrumented copy of app.R to this path (staging only) instead of the report",
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const="HEAD",
+        default=None,
+        metavar="REV_RANGE",
+        help="Analyze every commit touching app.R in REV_RANGE (default HEAD) instead of the report",
+    )
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        default=None,
+        metavar=("REV_A", "REV_B"),
+        help="Print handler/metric changes of app.R between two revisions",
+    )
+    parser.add_argument(
+        "--history-out",
+        default=None,
+        help="Output prefix for --history (.json/.csv; default: <out stem>-history)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Per-blob analysis cache for --history/--diff (default: <out dir>/.button-map-cache)",
     )
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for --history")
     args = parser.parse_args()
 
     app_path = Path(args.app)
     out_path = Path(args.out)
+    if args.format != "qmd" and out_path.suffix == ".qmd":
+        out_path = out_path.with_suffix(f".{args.format}")
+    reactive_json_path = (
+        Path(args.reactive_json)
+        if args.reactive_json
+        else out_path.with_name(f"{out_path.stem}-reactive.json")
+    )
+    cache_dir = Path(args.cache_dir) if args.cache_dir else out_path.parent / ".button-map-cache"
+
+    if args.diff:
+        try:
+            changes = diff_revisions(app_path, args.diff[0], args.diff[1], cache_dir)
+        except subprocess.CalledProcessError as exc:
+            print(f"[ERROR] git failed: {exc.stderr.strip() if exc.stderr else exc}")
+            return 1
+        print(f"[INFO] {app_path.name}: {args.diff[0]} -> {args.diff[1]}")
+        print("\n".join(changes) if changes else "No handler changes.")
+        return 0
+
+    if args.history:
+        started = dt.datetime.now()
+        try:
+            history = analyze_history(app_path, args.history, cache_dir, args.jobs)
+        except subprocess.CalledProcessError as exc:
+            print(f"[ERROR] git failed: {exc.stderr.strip() if exc.stderr else exc}")
+            return 1
+        prefix = Path(args.history_out) if args.history_out else out_path.with_name(f"{out_path.stem}-history")
+        json_path, csv_path = write_history(history, prefix)
+        elapsed = (dt.datetime.now() - started).total_seconds()
+        print(f"[OK] Wrote {json_path}")
+        print(f"[OK] Wrote {csv_path}")
+        print(
+            f"[INFO] {len(history['revisions'])} revisions, {history['analyzed']} blobs analyzed, "
+            f"{history['cached']} from cache ({elapsed:.1f}s)"
+        )
+        return 0
+
     text = app_path.read_text(encoding="utf-8")
     lines = text.splitlines()
 
+    if args.instrument_out:
+        instrument_path = Path(args.instrument_out)
+        if instrument_path.resolve() == app_path.resolve():
+            print("[ERROR] --instrument-out must not point at the source app.R")
+            return 1
+        instrumented, n_handlers, n_db_calls = instrument_app(text, lines, build_block_index(lines))
+        instrument_path.parent.mkdir(parents=True, exist_ok=True)
+        instrument_path.write_text(instrumented, encoding="utf-8")
+        print(f"[OK] Wrote instrumented app {instrument_path}")
+        print(f"[INFO] Timed observeEvent handlers: {n_handlers}")
+        print(f"[INFO] Timed dbGetQuery/dbExecute calls: {n_db_calls}")
+        return 0
+
     action_buttons = collect_action_buttons(lines)
     custom_functions = collect_custom_functions(lines)
-    handlers = collect_handlers(lines, action_buttons, custom_functions)
-    render_qmd(app_path, handlers, action_buttons, out_path)
+    block_ends = build_block_index(lines)
+    call_graph = build_call_graph(lines, custom_functions, block_ends)
+    reactive_graph = build_reactive_graph(lines, call_graph, block_ends)
+    fanout = reactive_fanout(reactive_graph)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    write_reactive_json(app_path, reactive_graph, fanout, reactive_json_path)
+
+    if args.format != "qmd":
+        writer = write_map_json if args.format == "json" else write_map_sqlite
+        stream = iter_handlers(lines, action_buttons, custom_functions, call_graph, block_ends)
+        n_handlers = writer(app_path, action_buttons, stream, out_path)
+        print(f"[OK] Wrote {out_path}")
+        print(f"[OK] Wrote {reactive_json_path}")
+        print(f"[INFO] actionButton count: {len(action_buttons)}")
+        print(f"[INFO] observeEvent(input$...) count: {n_handlers}")
+        return 0
+
+    handlers = collect_handlers(lines, action_buttons, custom_functions, call_graph, block_ends)
+    fanout_rows = button_fanout(handlers, fanout, reactive_graph["nodes"])
+    render_qmd(app_path, handlers, action_buttons, out_path, fanout_rows)
 
     print(f"[OK] Wrote {out_path}")
+    print(f"[OK] Wrote {reactive_json_path}")
     print(f"[INFO] actionButton count: {len(action_buttons)}")
     print(f"[INFO] observeEvent(input$...) count: {len(handlers)}")
+    if handlers:
+        top = cost_ranking(handlers)[0]
+        costs = ", ".join(f"{k}={v}" for k, v in top["transitive_costs"].items())
+        print(f"[INFO] Most expensive click: {top['input_id']} ({costs})")
     return 0
 
 
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import csv
+import datetime
+import glob
+import json
 import os
+import shutil
+import signal
 import sqlite3
-from typing import Dict, Optional, Tuple
+import time
+from operator import itemgetter
+from sys import intern
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from project_summary import build_summary, summary_installed
 
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -294,13 +304,349 @@ def normalize_text(value: Optional[str]) -> str:
     return (value or "").strip()
 
 
+class LookupCache:
+    """
+    Ids of users, budget holders and lookup rows resolved by earlier imports on
+    the same connection. Valid only while nothing else writes to the DB:
+    refresh() drops everything when PRAGMA data_version shows a commit from
+    another connection (e.g. the Shiny app), and clear() must be called after
+    a rollback (cached ids may belong to rolled-back rows).
+    """
+
+    def __init__(self) -> None:
+        self.ids: Dict[Tuple[str, ...], int] = {}
+        self.data_version: Optional[int] = None
+
+    def refresh(self, conn: sqlite3.Connection) -> bool:
+        """Return True if the cache was dropped because another connection wrote."""
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = self.data_version is not None and version != self.data_version
+        if changed:
+            self.ids.clear()
+        self.data_version = version
+        return changed
+
+    def clear(self) -> None:
+        self.ids.clear()
+        self.data_version = None
+
+    def get(self, key: Tuple[str, ...], create: Callable[[], int]) -> int:
+        if key not in self.ids:
+            self.ids[key] = create()
+        return self.ids[key]
+
+
+def prepare_database(conn: sqlite3.Connection) -> None:
+    """Schema checks/migrations needed before importing (idempotent)."""
+    ensure_full_name_column(conn)
+    if not projects_sql_has_current_statuses(conn):
+        rebuild_projects_table_with_current_statuses(conn)
+        if summary_installed(conn):
+            # Dropping the old projects table dropped the summary triggers too.
+            build_summary(conn)
+
+
+LEGACY_COLUMNS = (
+    "legacy_id",
+    "project_name",
+    "login",
+    "user_full_name",
+    "group_name",
+    "reference_genome",
+    "type_label",
+    "sample_type",
+    "sequencing_length",
+    "budget_group",
+    "sequencing_platform",
+    "note",
+)
+# Without these every row would be counted invalid; a file missing them is malformed.
+REQUIRED_COLUMNS = ("legacy_id", "project_name", "login")
+
+
+class LegacyRow(NamedTuple):
+    """One normalized legacy_projects.csv row (tuple storage, no per-row dict)."""
+
+    legacy_id: Optional[int]
+    project_name: str
+    username: str
+    full_name: str
+    group_name: str
+    reference_genome: str
+    type_label: str
+    sample_type: str
+    cycles_label: str
+    budget_group: str
+    sequencing_platform: Optional[str]
+    note: Optional[str]
+
+
+def legacy_row(values: Sequence[Optional[str]]) -> LegacyRow:
+    """
+    Normalize raw values given in LEGACY_COLUMNS order. Values that repeat
+    across rows (logins, names, groups, lookup labels) are interned, so staged
+    rows share one string per distinct value.
+    """
+    (legacy_id, project_name, login, user_full_name, group_name, reference_genome,
+     type_label, sample_type, sequencing_length, budget_group, platform, note) = values
+    legacy_id = normalize_text(legacy_id)
+    username = intern(normalize_text(login))
+    type_label = intern(normalize_text(type_label) or "Legacy")
+    return LegacyRow(
+        int(legacy_id) if legacy_id.isdigit() else None,
+        normalize_text(project_name),
+        username,
+        intern(normalize_text(user_full_name) or username),
+        intern(normalize_text(group_name)),
+        intern(normalize_reference_genome(reference_genome)),
+        type_label,
+        intern(normalize_text(sample_type) or type_label),
+        intern(normalize_text(sequencing_length) or "Legacy"),
+        intern(normalize_text(budget_group)),
+        intern(normalize_text(platform)) or None,
+        normalize_text(note) or None,
+    )
+
+
+def legacy_row_from_dict(row: Dict[str, str]) -> LegacyRow:
+    return legacy_row([row.get(col) for col in LEGACY_COLUMNS])
+
+
+def iter_legacy_rows(handle: Iterable[str]) -> Iterator[LegacyRow]:
+    """
+    csv.reader-based replacement for csv.DictReader: columns are looked up by
+    header index. Raises ValueError if a REQUIRED_COLUMNS column is missing;
+    other missing columns read as "".
+    """
+    reader = csv.reader(handle)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {name.strip().lstrip("\ufeff"): i for i, name in enumerate(header)}
+    missing = [col for col in REQUIRED_COLUMNS if col not in positions]
+    if missing:
+        raise ValueError(f"missing columns in CSV header: {', '.join(missing)}")
+    index = [positions.get(col) for col in LEGACY_COLUMNS]
+    if None not in index:
+        pick = itemgetter(*index)
+        width = max(index) + 1
+    for record in reader:
+        if not record:
+            continue
+        if None not in index and len(record) >= width:
+            yield legacy_row(pick(record))
+        else:
+            yield legacy_row([record[i] if i is not None and i < len(record) else "" for i in index])
+
+
+def import_rows(
+    conn: sqlite3.Connection,
+    rows: Iterable[Union[LegacyRow, Dict[str, str]]],
+    cache: Optional[LookupCache] = None,
+) -> Dict[str, object]:
+    """
+    Import legacy project rows (LegacyRow records from iter_legacy_rows, or
+    dicts with the legacy_projects.csv columns). Expects prepare_database() to
+    have run on this DB. Does not commit: the caller commits, or rolls back and
+    calls cache.clear().
+    """
+    if cache is None:
+        cache = LookupCache()
+    legacy_depth_id = cache.get(("depth", "legacy"), lambda: ensure_sequencing_depth(conn))
+
+    missing_budget_groups: set = set()
+    inserted = 0
+    skipped = 0
+    invalid = 0
+
+    for row in rows:
+        if isinstance(row, dict):
+            row = legacy_row_from_dict(row)
+        if row.legacy_id is None:
+            invalid += 1
+            continue
+
+        exists = conn.execute(
+            "SELECT 1 FROM projects WHERE project_id = ?",
+            (row.legacy_id,),
+        ).fetchone()
+        if exists:
+            skipped += 1
+            continue
+
+        if not row.project_name or not row.username:
+            invalid += 1
+            continue
+
+        user_id = cache.get(
+            ("user", row.username),
+            lambda: ensure_user(
+                conn, row.username, row.full_name, f"{row.username}@biochem.mpg.de", row.group_name
+            ),
+        )
+        # Rows without group and budget group share one "Legacy" placeholder
+        # while the cache is warm (before LookupCache: one placeholder per row).
+        budget_id = cache.get(
+            ("budget", row.group_name, row.budget_group),
+            lambda: find_or_create_budget_holder(conn, row.group_name, row.budget_group, missing_budget_groups),
+        )
+        type_id = cache.get(
+            ("type", row.type_label), lambda: get_or_create_simple(conn, "types", "name", row.type_label)
+        )
+        service_type_id = cache.get(
+            ("service_type", row.sample_type), lambda: get_or_create_service_type(conn, row.sample_type)
+        )
+        cycles_id = cache.get(
+            ("cycles", row.cycles_label),
+            lambda: get_or_create_simple(conn, "sequencing_cycles", "cycles_description", row.cycles_label),
+        )
+
+        conn.execute(
+            """
+            INSERT INTO projects (
+              project_id, project_name, user_id, responsible_user, reference_genome,
+              service_type_id, budget_id, description, sequencing_platform,
+              sequencing_depth_id, sequencing_cycles_id, type_id, status
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                row.legacy_id,
+                row.project_name,
+                user_id,
+                row.full_name,
+                row.reference_genome,
+                service_type_id,
+                budget_id,
+                row.note,
+                row.sequencing_platform,
+                legacy_depth_id,
+                cycles_id,
+                type_id,
+                "Legacy project",
+            ),
+        )
+        inserted += 1
+
+    return {
+        "inserted": inserted,
+        "skipped": skipped,
+        "invalid": invalid,
+        "missing_budget_groups": sorted(missing_budget_groups),
+    }
+
+
+def print_result(result: Dict[str, object]) -> None:
+    print(f"[OK] Inserted {result['inserted']} legacy projects.")
+    print(f"[OK] Skipped {result['skipped']} (already present).")
+    if result["missing_budget_groups"]:
+        print("[WARN] Missing budget holder groups (placeholders created):")
+        for name in result["missing_budget_groups"]:
+            print(f"  - {name}")
+
+
+def unique_destination(directory: str, filename: str) -> str:
+    dest = os.path.join(directory, filename)
+    if os.path.exists(dest):
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        dest = os.path.join(directory, f"{stamp}_{filename}")
+    return dest
+
+
+def ingest_file(conn: sqlite3.Connection, path: str, cache: LookupCache, inbox: str) -> Dict[str, object]:
+    """Import one inbox file in its own transaction, move it to done/ or failed/ and write its report."""
+    started = time.perf_counter()
+    report: Dict[str, object] = {"file": os.path.basename(path), "started": datetime.datetime.now().isoformat()}
+    try:
+        if cache.refresh(conn):
+            # Another connection wrote since the last file; re-check the schema too.
+            prepare_database(conn)
+            conn.commit()
+        with open(path, newline="", encoding="utf-8") as handle:
+            report.update(import_rows(conn, iter_legacy_rows(handle), cache))
+        conn.commit()
+        report["status"] = "done"
+    except Exception as exc:
+        conn.rollback()
+        cache.clear()
+        report["status"] = "failed"
+        report["error"] = f"{type(exc).__name__}: {exc}"
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    target_dir = os.path.join(inbox, str(report["status"]))
+    dest = unique_destination(target_dir, os.path.basename(path))
+    shutil.move(path, dest)
+    with open(dest + ".report.json", "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+        handle.write("\n")
+    return report
+
+
+def pending_files(inbox: str, settle_seconds: float) -> List[str]:
+    """CSV files in the inbox that have not been modified for settle_seconds (fully written)."""
+    now = time.time()
+    files = []
+    for path in sorted(glob.glob(os.path.join(inbox, "*.csv"))):
+        try:
+            if now - os.path.getmtime(path) >= settle_seconds:
+                files.append(path)
+        except OSError:
+            continue
+    return files
+
+
+def run_daemon(conn: sqlite3.Connection, inbox: str, poll_seconds: float, settle_seconds: float, once: bool) -> int:
+    for sub in ("done", "failed"):
+        os.makedirs(os.path.join(inbox, sub), exist_ok=True)
+
+    stop = {"requested": False}
+
+    def request_stop(_signum, _frame):
+        stop["requested"] = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    cache = LookupCache()
+    cache.refresh(conn)
+    failed = 0
+    print(f"[INFO] Watching {inbox} (poll every {poll_seconds}s)")
+    while not stop["requested"]:
+        for path in pending_files(inbox, settle_seconds):
+            report = ingest_file(conn, path, cache, inbox)
+            if report["status"] == "done":
+                print(
+                    f"[OK] {report['file']}: inserted {report['inserted']}, skipped {report['skipped']}, "
+                    f"invalid {report['invalid']} ({report['elapsed_ms']} ms)"
+                )
+            else:
+                failed += 1
+                print(f"[ERROR] {report['file']}: {report['error']} ({report['elapsed_ms']} ms)")
+            if stop["requested"]:
+                break
+        if once:
+            break
+        time.sleep(poll_seconds)
+    return 1 if (once and failed) else 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Import legacy projects into the Shiny SQLite DB.")
     parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to sequencing_projects.db")
     parser.add_argument("--csv", default=DEFAULT_CSV_PATH, help="Path to legacy_projects.csv")
+    parser.add_argument(
+        "--inbox",
+        default=None,
+        help="Daemon mode: import every *.csv dropped here, then move it to done/ or failed/ with a report",
+    )
+    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Inbox poll interval")
+    parser.add_argument(
+        "--settle-seconds", type=float, default=1.0, help="Skip inbox files modified more recently than this"
+    )
+    parser.add_argument("--once", action="store_true", help="Process the current inbox files and exit")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000, help="SQLite busy timeout")
     args = parser.parse_args()
 
-    if not os.path.exists(args.csv):
+    if not args.inbox and not os.path.exists(args.csv):
         print(f"[ERROR] CSV not found: {args.csv}")
         return 1
 
@@ -310,92 +656,30 @@ def main() -> int:
 
     conn = sqlite3.connect(args.db)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
 
-    ensure_full_name_column(conn)
-    if not projects_sql_has_current_statuses(conn):
-        rebuild_projects_table_with_current_statuses(conn)
-
-    legacy_depth_id = ensure_sequencing_depth(conn)
-
-    missing_budget_groups = set()
-    inserted = 0
-    skipped = 0
+    prepare_database(conn)
+    conn.commit()
 
-    with open(args.csv, newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            legacy_id = normalize_text(row.get("legacy_id"))
-            if not legacy_id.isdigit():
-                continue
-            legacy_id_int = int(legacy_id)
-
-            exists = conn.execute(
-                "SELECT 1 FROM projects WHERE project_id = ?",
-                (legacy_id_int,),
-            ).fetchone()
-            if exists:
-                skipped += 1
-                continue
-
-            project_name = normalize_text(row.get("project_name"))
-            username = normalize_text(row.get("login"))
-            full_name = normalize_text(row.get("user_full_name")) or username
-            group_name = normalize_text(row.get("group_name"))
-            reference_genome = normalize_reference_genome(row.get("reference_genome"))
-            type_label = normalize_text(row.get("type_label")) or "Legacy"
-            sample_type = normalize_text(row.get("sample_type")) or type_label
-            sequencing_length = normalize_text(row.get("sequencing_length"))
-            budget_group = normalize_text(row.get("budget_group"))
-            sequencing_platform = normalize_text(row.get("sequencing_platform"))
-            note = normalize_text(row.get("note"))
-
-            if not project_name or not username:
-                continue
-
-            user_email = f"{username}@biochem.mpg.de"
-            user_id = ensure_user(conn, username, full_name, user_email, group_name)
-            budget_id = find_or_create_budget_holder(conn, group_name, budget_group, missing_budget_groups)
-            type_id = get_or_create_simple(conn, "types", "name", type_label)
-            service_type_id = get_or_create_service_type(conn, sample_type)
-            cycles_label = sequencing_length if sequencing_length else "Legacy"
-            cycles_id = get_or_create_simple(conn, "sequencing_cycles", "cycles_description", cycles_label)
+    if args.inbox:
+        try:
+            return run_daemon(conn, args.inbox, args.poll_seconds, args.settle_seconds, args.once)
+        finally:
+            conn.close()
 
-            conn.execute(
-                """
-                INSERT INTO projects (
-                  project_id, project_name, user_id, responsible_user, reference_genome,
-                  service_type_id, budget_id, description, sequencing_platform,
-                  sequencing_depth_id, sequencing_cycles_id, type_id, status
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    legacy_id_int,
-                    project_name,
-                    user_id,
-                    full_name,
-                    reference_genome,
-                    service_type_id,
-                    budget_id,
-                    note if note else None,
-                    sequencing_platform if sequencing_platform else None,
-                    legacy_depth_id,
-                    cycles_id,
-                    type_id,
-                    "Legacy project",
-                ),
-            )
-            inserted += 1
+    try:
+        with open(args.csv, newline="", encoding="utf-8") as handle:
+            result = import_rows(conn, iter_legacy_rows(handle))
+    except ValueError as exc:
+        conn.rollback()
+        conn.close()
+        print(f"[ERROR] {exc}")
+        return 1
 
     conn.commit()
     conn.close()
 
-    print(f"[OK] Inserted {inserted} legacy projects.")
-    print(f"[OK] Skipped {skipped} (already present).")
-    if missing_budget_groups:
-        print("[WARN] Missing budget holder groups (placeholders created):")
-        for name in sorted(missing_budget_groups):
-            print(f"  - {name}")
-
+    print_result(result)
     return 0
 
 
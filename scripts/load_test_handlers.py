@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Replay the SQL behind Shiny button handlers against a copy of
+sequencing_projects.db with many concurrent simulated sessions.
+
+Statements come from generate_button_function_map.py: the static SQL in each
+handler plus every helper it reaches (e.g. load_projects()). The idempotent
+migration and seed helpers that get_db_connection() runs on every connection
+(ensure_*, migrate_*, seed_*) are not replayed: on a migrated DB they change
+nothing, while replaying their writes with sampled ids would mutate rows.
+
+A scenario is a handler input id or a custom function name; each simulated
+action opens a connection (like get_db_connection()), runs all statements of
+one scenario in autocommit mode, and closes it. Parameters are bound with
+values sampled from the matching column of the copied DB.
+
+The source DB is only read (via the SQLite backup API); all load goes to the copy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import generate_button_function_map as button_map
+from analyze_handler_timings import percentile
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_APP_PATH = REPO_ROOT / "sequencing-app" / "app.R"
+DEFAULT_DB_PATH = REPO_ROOT / "sequencing-app" / "sequencing_projects.db"
+DEFAULT_MIX = "load_projects=50,update_project_btn=2,confirm_status_update_btn=1"
+
+TABLE_RE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|JOIN|table_info\s*\()\s*([A-Za-z_][A-Za-z0-9_]*)(?:\s+(?:AS\s+)?([A-Za-z_][A-Za-z0-9_]*))?",
+    re.IGNORECASE,
+)
+PARAM_COLUMN_RE = re.compile(
+    r"([A-Za-z_][A-Za-z0-9_.]*)\s*\)*\s*(?:=|<>|!=|<=|>=|<|>|\bLIKE\b|\bIN\b)\s*[\(\s]*(?:[A-Za-z_]+\s*\(\s*)*$",
+    re.IGNORECASE,
+)
+INSERT_COLUMNS_RE = re.compile(r"\bINTO\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(([^)]*)\)", re.IGNORECASE)
+READ_SQL_RE = re.compile(r"^\s*(SELECT|PRAGMA)\b", re.IGNORECASE)
+SQL_KEYWORDS = {"select", "where", "and", "or", "on", "set", "join", "left", "order", "group", "by", "not", "as"}
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def count_writes(statements: list[dict]) -> int:
+    return sum(1 for st in statements if not READ_SQL_RE.match(st["sql"]))
+
+
+def load_scenarios(app_path: Path) -> dict[str, list[dict]]:
+    """
+    Static SQL per handler input id and per custom function (including
+    everything it reaches), without the migration/seed helpers.
+    """
+    lines = app_path.read_text(encoding="utf-8").splitlines()
+    block_ends = button_map.build_block_index(lines)
+    custom_functions = button_map.collect_custom_functions(lines)
+    call_graph = button_map.build_call_graph(lines, custom_functions, block_ends)
+    reachability = button_map.compute_reachability(button_map.without_setup_helpers(call_graph))
+    function_sql = button_map.collect_function_sql(lines, block_ends)
+
+    scenarios: dict[str, list[dict]] = {}
+    for name, reached in reachability.items():
+        statements = []
+        for fn in [name] + sorted(reached - {name}):
+            statements.extend(function_sql.get(fn, []))
+        scenarios[name] = statements
+    handlers = button_map.collect_handlers(
+        lines, button_map.collect_action_buttons(lines), custom_functions, call_graph, block_ends
+    )
+    for h in handlers:
+        scenarios.setdefault(h["input_id"], []).extend(h["sql_statements"])
+    return scenarios
+
+
+def copy_database(source: Path, target: Path) -> None:
+    """Consistent copy through the backup API, safe while the app holds the source open."""
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+class ParamSampler:
+    """Bind `?` placeholders with existing values of the column they are compared to or inserted into."""
+
+    def __init__(self, conn: sqlite3.Connection, pool_size: int = 200):
+        self.conn = conn
+        self.pool_size = pool_size
+        self.pools: dict[tuple[str, str], list] = {}
+
+    def pool(self, table: str, column: str) -> list:
+        key = (table, column)
+        if key not in self.pools:
+            try:
+                rows = self.conn.execute(
+                    f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL LIMIT ?',
+                    (self.pool_size,),
+                ).fetchall()
+                self.pools[key] = [r[0] for r in rows]
+            except sqlite3.Error:
+                self.pools[key] = []
+        return self.pools[key]
+
+    def slots(self, sql: str) -> list[tuple[str, str] | None]:
+        """(table, column) for every placeholder in order; None when it cannot be inferred."""
+        aliases: dict[str, str] = {}
+        main_table = None
+        for m in TABLE_RE.finditer(sql):
+            main_table = main_table or m.group(1)
+            aliases[m.group(1).lower()] = m.group(1)
+            if m.group(2) and m.group(2).lower() not in SQL_KEYWORDS:
+                aliases[m.group(2).lower()] = m.group(1)
+
+        insert_cols: list[str] = []
+        insert = INSERT_COLUMNS_RE.search(sql)
+        if insert:
+            insert_cols = [c.strip() for c in insert.group(2).split(",")]
+
+        out: list[tuple[str, str] | None] = []
+        insert_idx = 0
+        for pos, ch in enumerate(sql):
+            if ch != "?":
+                continue
+            m = PARAM_COLUMN_RE.search(sql[:pos])
+            if m:
+                qualifier, _, column = m.group(1).rpartition(".")
+                table = aliases.get(qualifier.lower(), main_table) if qualifier else main_table
+                out.append((table, column) if table else None)
+            elif insert and insert_idx < len(insert_cols) and pos > insert.end():
+                out.append((insert.group(1), insert_cols[insert_idx]))
+                insert_idx += 1
+            else:
+                out.append(None)
+        return out
+
+    def params(self, slots: list[tuple[str, str] | None], rng: random.Random) -> tuple:
+        values = []
+        for slot in slots:
+            pool = self.pool(*slot) if slot else []
+            values.append(rng.choice(pool) if pool else None)
+        return tuple(values)
+
+
+def prepare_scenarios(
+    conn: sqlite3.Connection, scenarios: dict[str, list[dict]], names: list[str], sampler: ParamSampler
+) -> tuple[dict[str, list[dict]], list[dict]]:
+    """Keep statements SQLite can plan on the copy (EXPLAIN); report the rest."""
+    rng = random.Random(0)
+    prepared: dict[str, list[dict]] = {}
+    rejected = []
+    for name in names:
+        prepared[name] = []
+        for st in scenarios[name]:
+            slots = sampler.slots(st["sql"])
+            try:
+                conn.execute("EXPLAIN " + st["sql"], sampler.params(slots, rng)).fetchall()
+            except sqlite3.Error as exc:
+                rejected.append({"scenario": name, "line": st["line"], "error": str(exc)})
+                continue
+            prepared[name].append({**st, "slots": slots})
+    return prepared, rejected
+
+
+def is_busy(exc: sqlite3.OperationalError) -> bool:
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def run_session(
+    session_id: int,
+    db_path: Path,
+    prepared: dict[str, list[dict]],
+    mix: dict[str, float],
+    sampler: ParamSampler,
+    args: argparse.Namespace,
+    deadline: float,
+    results: list,
+) -> None:
+    rng = random.Random(args.seed + session_id)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    conn = None
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        outcome = "ok"
+        busy = statements = 0
+        if conn is None:
+            conn = sqlite3.connect(db_path, timeout=args.busy_timeout_ms / 1000.0, isolation_level=None)
+        try:
+            for st in prepared[name]:
+                statements += 1
+                try:
+                    conn.execute(st["sql"], sampler.params(st["slots"], rng)).fetchall()
+                except sqlite3.OperationalError as exc:
+                    if is_busy(exc):
+                        busy += 1
+                        outcome = "busy"
+                    else:
+                        outcome = "error"
+                    break
+                except sqlite3.Error:
+                    outcome = "error"
+                    break
+        finally:
+            if not args.persistent_connections:
+                conn.close()
+                conn = None
+        results.append((name, outcome, (time.perf_counter() - started) * 1000.0, statements, busy))
+        if args.think_ms > 0:
+            time.sleep(rng.expovariate(1000.0 / args.think_ms))
+    if conn is not None:
+        conn.close()
+
+
+def summarize(results: list, elapsed_s: float) -> dict:
+    per_scenario: dict[str, dict] = defaultdict(lambda: {"latency": [], "outcomes": Counter(), "statements": 0, "busy": 0})
+    for name, outcome, latency_ms, statements, busy in results:
+        entry = per_scenario[name]
+        entry["latency"].append(latency_ms)
+        entry["outcomes"][outcome] += 1
+        entry["statements"] += statements
+        entry["busy"] += busy
+
+    def stats(latency: list[float], outcomes: Counter, statements: int, busy: int) -> dict:
+        latency = sorted(latency)
+        return {
+            "actions": len(latency),
+            "ok": outcomes["ok"],
+            "busy": outcomes["busy"],
+            "errors": outcomes["error"],
+            "statements": statements,
+            "busy_rate": round(busy / statements, 4) if statements else 0.0,
+            "p50_ms": round(percentile(latency, 50), 2),
+            "p95_ms": round(percentile(latency, 95), 2),
+            "p99_ms": round(percentile(latency, 99), 2),
+        }
+
+    total_statements = sum(r[3] for r in results)
+    overall = stats(
+        [r[2] for r in results],
+        Counter(r[1] for r in results),
+        total_statements,
+        sum(r[4] for r in results),
+    )
+    overall["actions_per_s"] = round(len(results) / elapsed_s, 2) if elapsed_s else 0.0
+    overall["statements_per_s"] = round(total_statements / elapsed_s, 2) if elapsed_s else 0.0
+    return {
+        "elapsed_s": round(elapsed_s, 2),
+        "overall": overall,
+        "scenarios": {
+            name: stats(e["latency"], e["outcomes"], e["statements"], e["busy"])
+            for name, e in sorted(per_scenario.items())
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay handler SQL against a copy of sequencing_projects.db.")
+    parser.add_argument("--app", default=str(DEFAULT_APP_PATH), help="Path to app.R (SQL source)")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Source sequencing_projects.db (only read)")
+    parser.add_argument("--work-db", default=None, help="Where to put the copy (default: temp dir, removed afterwards)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights, e.g. '{DEFAULT_MIX}'")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated sessions (threads)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Run time in seconds")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="Mean pause between actions per session (0 = none)")
+    parser.add_argument("--busy-timeout-ms", type=int, default=0, help="SQLite busy timeout per connection (RSQLite default: 0)")
+    parser.add_argument("--persistent-connections", action="store_true", help="Reuse one connection per session instead of one per action")
+    parser.add_argument("--journal-mode", choices=["delete", "wal", "truncate"], default=None, help="Set journal mode on the copy first")
+    parser.add_argument("--setup-sql", default=None, help="SQL file run on the copy before the test (e.g. CREATE INDEX ...)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--json", dest="json_out", default=None, help="Also write results as JSON to this path")
+    parser.add_argument("--list", action="store_true", help="List available scenarios and exit")
+    args = parser.parse_args()
+
+    scenarios = load_scenarios(Path(args.app))
+    if args.list:
+        for name in sorted(scenarios):
+            if scenarios[name]:
+                print(f"{name}\t{len(scenarios[name])} statements, {count_writes(scenarios[name])} writes")
+        return 0
+
+    mix = parse_mix(args.mix)
+    unknown = [n for n in mix if n not in scenarios]
+    if unknown:
+        print(f"[ERROR] Unknown scenario(s): {', '.join(unknown)} (see --list)")
+        return 1
+    if not os.path.exists(args.db):
+        print(f"[ERROR] DB not found: {args.db}")
+        return 1
+
+    temp_dir = None
+    if args.work_db:
+        work_db = Path(args.work_db)
+        if work_db.resolve() == Path(args.db).resolve():
+            print("[ERROR] --work-db must not be the source DB")
+            return 1
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="bcf-loadtest-")
+        work_db = Path(temp_dir) / "sequencing_projects.db"
+
+    try:
+        copy_database(Path(args.db), work_db)
+        setup = sqlite3.connect(work_db, isolation_level=None)
+        if args.journal_mode:
+            setup.execute(f"PRAGMA journal_mode={args.journal_mode}")
+        if args.setup_sql:
+            setup.executescript(Path(args.setup_sql).read_text(encoding="utf-8"))
+        sampler = ParamSampler(setup)
+        prepared, rejected = prepare_scenarios(setup, scenarios, list(mix), sampler)
+        for name in mix:
+            for st in prepared[name]:
+                for slot in st["slots"]:
+                    if slot:
+                        sampler.pool(*slot)
+        setup.close()
+
+        print(f"[INFO] Work copy: {work_db}")
+        for name in mix:
+            print(
+                f"[INFO] {name}: {len(prepared[name])} statements, "
+                f"{count_writes(prepared[name])} writes (weight {mix[name]:g})"
+            )
+        if rejected:
+            print(f"[WARN] {len(rejected)} statements skipped (could not be planned on this DB)")
+
+        results: list = []
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(
+                target=run_session,
+                args=(i, work_db, prepared, mix, sampler, args, deadline, results),
+                daemon=True,
+            )
+            for i in range(args.sessions)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        summary = summarize(results, time.perf_counter() - started)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    summary["config"] = {
+        "sessions": args.sessions,
+        "duration": args.duration,
+        "think_ms": args.think_ms,
+        "busy_timeout_ms": args.busy_timeout_ms,
+        "journal_mode": args.journal_mode,
+        "persistent_connections": args.persistent_connections,
+        "mix": mix,
+    }
+    summary["skipped_statements"] = rejected
+
+    o = summary["overall"]
+    print("")
+    print("| Scenario | Actions | OK | Busy | Errors | Busy rate | p50 ms | p95 ms | p99 ms |")
+    print("|---|---:|---:|---:|---:|---:|---:|---:|---:|")
+    for name, s in list(summary["scenarios"].items()) + [("**all**", o)]:
+        print(
+            f"| `{name}` | {s['actions']} | {s['ok']} | {s['busy']} | {s['errors']} | "
+            f"{s['busy_rate']:.2%} | {s['p50_ms']:.2f} | {s['p95_ms']:.2f} | {s['p99_ms']:.2f} |"
+        )
+    print("")
+    print(f"[INFO] Throughput: {o['actions_per_s']} actions/s, {o['statements_per_s']} statements/s")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+        print(f"[OK] Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
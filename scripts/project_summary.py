@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated project counts and cost sums for dashboard and billing queries.
+
+project_summary holds one row per (month, status, budget_id, service_type_id)
+with the number of projects and their total/additional cost. Triggers on
+projects keep it current on every INSERT, DELETE and UPDATE of a grouped or
+summed column, so queries like
+
+    SELECT status, SUM(n_projects), SUM(total_cost) FROM project_summary GROUP BY status;
+
+read O(groups) rows instead of the whole projects table.
+
+Default run: (re)install table and triggers and backfill from projects in one
+write transaction, then verify against a full recompute. Rebuilding the
+projects table (status CHECK migration in app.R or import_legacy_projects.py)
+drops the triggers; --verify reports that and a rebuild run fixes it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = REPO_ROOT / "sequencing-app" / "sequencing_projects.db"
+
+# Cost sums are REAL and maintained by repeated add/subtract; compare to the cent.
+COST_TOLERANCE = 0.005
+
+GROUP_COLUMNS = ("month", "status", "budget_id", "service_type_id")
+TRIGGERS = ("project_summary_insert", "project_summary_delete", "project_summary_update")
+
+# Group key of a projects row; p is NEW, OLD or the table alias. COALESCE keeps
+# NULLs out of the primary key (NULLs would never conflict in the upsert).
+KEY_EXPR = {
+    "month": "COALESCE(substr({p}.created_at, 1, 7), '')",
+    "status": "COALESCE({p}.status, '')",
+    "budget_id": "COALESCE({p}.budget_id, 0)",
+    "service_type_id": "COALESCE({p}.service_type_id, 0)",
+}
+
+SUMMARY_DDL = """
+CREATE TABLE IF NOT EXISTS project_summary (
+    month TEXT NOT NULL,
+    status TEXT NOT NULL,
+    budget_id INTEGER NOT NULL,
+    service_type_id INTEGER NOT NULL,
+    n_projects INTEGER NOT NULL,
+    total_cost REAL NOT NULL,
+    additional_cost REAL NOT NULL,
+    PRIMARY KEY (month, status, budget_id, service_type_id)
+)
+"""
+
+
+def key_values(p: str) -> str:
+    return ", ".join(KEY_EXPR[col].format(p=p) for col in GROUP_COLUMNS)
+
+
+def add_row_sql(p: str) -> str:
+    return f"""
+        INSERT INTO project_summary ({", ".join(GROUP_COLUMNS)}, n_projects, total_cost, additional_cost)
+        VALUES ({key_values(p)}, 1, COALESCE({p}.total_cost, 0), COALESCE({p}.additional_cost, 0))
+        ON CONFLICT ({", ".join(GROUP_COLUMNS)}) DO UPDATE SET
+            n_projects = n_projects + 1,
+            total_cost = total_cost + excluded.total_cost,
+            additional_cost = additional_cost + excluded.additional_cost;
+    """
+
+
+def remove_row_sql(p: str) -> str:
+    match = " AND ".join(f"{col} = {KEY_EXPR[col].format(p=p)}" for col in GROUP_COLUMNS)
+    return f"""
+        UPDATE project_summary SET
+            n_projects = n_projects - 1,
+            total_cost = total_cost - COALESCE({p}.total_cost, 0),
+            additional_cost = additional_cost - COALESCE({p}.additional_cost, 0)
+        WHERE {match};
+        DELETE FROM project_summary WHERE n_projects <= 0 AND {match};
+    """
+
+
+def trigger_ddl() -> list[str]:
+    # UPDATE OF lists only grouped/summed columns, so auto_project_id's
+    # UPDATE of project_id does not fire it.
+    return [
+        f"""
+        CREATE TRIGGER project_summary_insert AFTER INSERT ON projects
+        FOR EACH ROW BEGIN {add_row_sql("NEW")} END
+        """,
+        f"""
+        CREATE TRIGGER project_summary_delete AFTER DELETE ON projects
+        FOR EACH ROW BEGIN {remove_row_sql("OLD")} END
+        """,
+        f"""
+        CREATE TRIGGER project_summary_update
+        AFTER UPDATE OF created_at, status, budget_id, service_type_id, total_cost, additional_cost ON projects
+        FOR EACH ROW BEGIN {remove_row_sql("OLD")} {add_row_sql("NEW")} END
+        """,
+    ]
+
+
+def recompute_sql() -> str:
+    return f"""
+        SELECT {key_values("p")}, COUNT(*), SUM(COALESCE(p.total_cost, 0)), SUM(COALESCE(p.additional_cost, 0))
+        FROM projects p
+        GROUP BY 1, 2, 3, 4
+    """
+
+
+def summary_installed(conn: sqlite3.Connection) -> bool:
+    return bool(
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'project_summary'"
+        ).fetchone()
+    )
+
+
+def missing_triggers(conn: sqlite3.Connection) -> list[str]:
+    present = {
+        r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'projects'")
+    }
+    return [name for name in TRIGGERS if name not in present]
+
+
+def drop_summary(conn: sqlite3.Connection) -> None:
+    for name in TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute("DROP TABLE IF EXISTS project_summary")
+
+
+def build_summary(conn: sqlite3.Connection) -> int:
+    """
+    Install table and triggers and backfill in one write transaction, so no
+    concurrent insert is missed or counted twice. Returns the number of groups.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        for name in TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(SUMMARY_DDL)
+        conn.execute("DELETE FROM project_summary")
+        conn.execute(
+            f"INSERT INTO project_summary ({', '.join(GROUP_COLUMNS)}, n_projects, total_cost, additional_cost) "
+            + recompute_sql()
+        )
+        for ddl in trigger_ddl():
+            conn.execute(ddl)
+        groups = conn.execute("SELECT COUNT(*) FROM project_summary").fetchone()[0]
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return groups
+
+
+def verify_summary(conn: sqlite3.Connection) -> list[str]:
+    """Differences between project_summary and a full recompute (empty = consistent)."""
+    problems = [f"missing trigger {name}" for name in missing_triggers(conn)]
+    expected = {tuple(r[:4]): tuple(r[4:]) for r in conn.execute(recompute_sql())}
+    stored = {
+        tuple(r[:4]): tuple(r[4:])
+        for r in conn.execute(
+            f"SELECT {', '.join(GROUP_COLUMNS)}, n_projects, total_cost, additional_cost FROM project_summary"
+        )
+    }
+    for key in sorted(set(expected) | set(stored), key=str):
+        want = expected.get(key, (0, 0.0, 0.0))
+        have = stored.get(key, (0, 0.0, 0.0))
+        if (
+            want[0] != have[0]
+            or abs(want[1] - have[1]) > COST_TOLERANCE
+            or abs(want[2] - have[2]) > COST_TOLERANCE
+        ):
+            label = ", ".join(f"{col}={val!r}" for col, val in zip(GROUP_COLUMNS, key))
+            problems.append(f"{label}: expected {want}, stored {have}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build and verify the trigger-maintained project_summary table.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to sequencing_projects.db")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--verify", action="store_true", help="Only compare project_summary with a full recompute")
+    action.add_argument("--drop", action="store_true", help="Remove project_summary and its triggers")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000, help="SQLite busy timeout")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] DB not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
+    try:
+        if args.drop:
+            drop_summary(conn)
+            conn.commit()
+            print("[OK] Dropped project_summary and its triggers")
+            return 0
+
+        if not args.verify:
+            groups = build_summary(conn)
+            print(f"[OK] Built project_summary: {groups} groups, triggers {', '.join(TRIGGERS)}")
+        elif not summary_installed(conn):
+            print("[ERROR] project_summary does not exist; run without --verify to build it")
+            return 1
+
+        problems = verify_summary(conn)
+    finally:
+        conn.close()
+
+    if problems:
+        print(f"[ERROR] project_summary differs from a full recompute ({len(problems)} problems):")
+        for line in problems[:50]:
+            print(f"  - {line}")
+        print("[INFO] Rebuild with: python3 scripts/project_summary.py --db <db>")
+        return 1
+    print("[OK] project_summary matches a full recompute of projects")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Retention job for email_logs and backup_logs in sequencing_projects.db.
+
+Rows older than --keep-days are processed oldest first in bounded batches.
+Each batch runs in its own short write transaction:
+
+1. copy the raw rows to the archive (gzipped CSV files in --archive-dir, or the
+   same table in an attached --archive-db),
+2. add them to the daily summary tables in the live DB
+   (email_log_daily: counts per day, status and recipient domain;
+    backup_log_daily: counts and sizes per day and user),
+3. delete them from the live table.
+
+Between batches the lock is released (--pause-ms), so the app can keep writing
+while the job runs from cron. Archive files are flushed to disk before the
+batch commits; if the job is killed in between, the next run archives those
+rows again (same ids), nothing is lost.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import gzip
+import io
+import os
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = REPO_ROOT / "sequencing-app" / "sequencing_projects.db"
+
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_log_daily (
+    day TEXT NOT NULL,
+    status TEXT NOT NULL,
+    recipient_domain TEXT NOT NULL,
+    n_logs INTEGER NOT NULL,
+    PRIMARY KEY (day, status, recipient_domain)
+);
+CREATE TABLE IF NOT EXISTS backup_log_daily (
+    day TEXT NOT NULL,
+    backed_up_by TEXT NOT NULL,
+    n_backups INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    max_size INTEGER NOT NULL,
+    PRIMARY KEY (day, backed_up_by)
+);
+"""
+
+
+def email_rollup(rows: list[sqlite3.Row]) -> list[tuple]:
+    """
+    (day, status, recipient_domain, n) per batch. A log row addressed to several
+    domains (comma/semicolon separated sent_to) counts once under each domain.
+    """
+    counts: Counter = Counter()
+    for row in rows:
+        day = (row["sent_at"] or row["created_at"])[:10]
+        status = (row["status"] or "unknown").strip().lower() or "unknown"
+        recipients = (row["sent_to"] or "").replace(";", ",").split(",")
+        domains = {r.rsplit("@", 1)[1].strip().lower() for r in recipients if "@" in r}
+        for domain in domains or {"unknown"}:
+            counts[(day, status, domain)] += 1
+    return [(*key, n) for key, n in sorted(counts.items())]
+
+
+def backup_rollup(rows: list[sqlite3.Row]) -> list[tuple]:
+    """(day, backed_up_by, n, total_size, max_size) per batch."""
+    agg: dict[tuple, list[int]] = {}
+    for row in rows:
+        key = (row["created_at"][:10], row["backed_up_by"] or "unknown")
+        size = int(row["backup_size"] or 0)
+        entry = agg.setdefault(key, [0, 0, 0])
+        entry[0] += 1
+        entry[1] += size
+        entry[2] = max(entry[2], size)
+    return [(*key, *values) for key, values in sorted(agg.items())]
+
+
+LOG_TABLES = {
+    "email_logs": {
+        "timestamp": "COALESCE(sent_at, created_at)",
+        "rollup": email_rollup,
+        "upsert": """
+            INSERT INTO email_log_daily (day, status, recipient_domain, n_logs) VALUES (?, ?, ?, ?)
+            ON CONFLICT (day, status, recipient_domain) DO UPDATE SET n_logs = n_logs + excluded.n_logs
+        """,
+    },
+    "backup_logs": {
+        "timestamp": "created_at",
+        "rollup": backup_rollup,
+        "upsert": """
+            INSERT INTO backup_log_daily (day, backed_up_by, n_backups, total_size, max_size)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (day, backed_up_by) DO UPDATE SET
+                n_backups = n_backups + excluded.n_backups,
+                total_size = total_size + excluded.total_size,
+                max_size = MAX(max_size, excluded.max_size)
+        """,
+    },
+}
+
+
+class CsvArchive:
+    """One gzipped CSV per table and run, fsynced after every batch."""
+
+    def __init__(self, archive_dir: Path, stamp: str):
+        self.archive_dir = archive_dir
+        self.stamp = stamp
+        self.files: dict[str, tuple] = {}
+
+    def path_for(self, table: str) -> Path:
+        return self.archive_dir / f"{table}-{self.stamp}.csv.gz"
+
+    def write(self, conn: sqlite3.Connection, table: str, rows: list[sqlite3.Row]) -> None:
+        if table not in self.files:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            raw = open(self.path_for(table), "wb")
+            text = io.TextIOWrapper(gzip.GzipFile(fileobj=raw, mode="wb"), encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(rows[0].keys())
+            self.files[table] = (raw, text, writer)
+        raw, text, writer = self.files[table]
+        writer.writerows(tuple(row) for row in rows)
+        text.flush()
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    def close(self) -> list[Path]:
+        paths = []
+        for table, (raw, text, _) in self.files.items():
+            text.close()
+            raw.close()
+            paths.append(self.path_for(table))
+        return paths
+
+
+class DbArchive:
+    """Same table layout in an attached archive DB; rows are copied inside the batch transaction."""
+
+    def __init__(self, conn: sqlite3.Connection, archive_db: Path):
+        self.archive_db = archive_db
+        conn.execute("ATTACH DATABASE ? AS archive", (str(archive_db),))
+        self.ready: set[str] = set()
+
+    def ensure_table(self, conn: sqlite3.Connection, table: str) -> None:
+        if table in self.ready:
+            return
+        ddl = conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()[0]
+        ddl = ddl.replace("CREATE TABLE IF NOT EXISTS", "CREATE TABLE", 1)
+        ddl = ddl.replace(f"CREATE TABLE {table}", f"CREATE TABLE IF NOT EXISTS archive.{table}", 1)
+        conn.execute(ddl)
+        self.ready.add(table)
+
+    def write(self, conn: sqlite3.Connection, table: str, rows: list[sqlite3.Row]) -> None:
+        self.ensure_table(conn, table)
+        columns = rows[0].keys()
+        conn.executemany(
+            f"INSERT OR IGNORE INTO archive.{table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            [tuple(row) for row in rows],
+        )
+
+    def close(self) -> list[Path]:
+        return [self.archive_db]
+
+
+def count_eligible(conn: sqlite3.Connection, table: str, cutoff: str) -> int:
+    ts = LOG_TABLES[table]["timestamp"]
+    return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {ts} < ?", (cutoff,)).fetchone()[0]
+
+
+def process_table(
+    conn: sqlite3.Connection,
+    table: str,
+    cutoff: str,
+    archive,
+    batch_size: int,
+    pause_s: float,
+    max_batches: int | None,
+) -> dict:
+    """
+    Archive, roll up and delete one table batch by batch. Old rows have the
+    lowest ids, so `ORDER BY id LIMIT` stops after a short scan and every batch
+    is exactly the eligible rows with id <= the batch's last id.
+    """
+    spec = LOG_TABLES[table]
+    ts = spec["timestamp"]
+    stats = {"table": table, "rows": 0, "summary_rows": 0, "batches": 0}
+    while max_batches is None or stats["batches"] < max_batches:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE {ts} < ? ORDER BY id LIMIT ?", (cutoff, batch_size)
+            ).fetchall()
+            if not rows:
+                conn.execute("ROLLBACK")
+                break
+            archive.write(conn, table, rows)
+            summary = spec["rollup"](rows)
+            conn.executemany(spec["upsert"], summary)
+            conn.execute(
+                f"DELETE FROM {table} WHERE id <= ? AND {ts} < ?", (rows[-1]["id"], cutoff)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        stats["rows"] += len(rows)
+        stats["summary_rows"] += len(summary)
+        stats["batches"] += 1
+        if len(rows) < batch_size:
+            break
+        time.sleep(pause_s)
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Roll up, archive and delete old email_logs/backup_logs rows in bounded batches."
+    )
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to sequencing_projects.db")
+    parser.add_argument("--keep-days", type=int, default=365, help="Keep raw rows newer than this many days")
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        choices=sorted(LOG_TABLES),
+        default=sorted(LOG_TABLES),
+        help="Log tables to process",
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--archive-dir", default=None, help="Write raw rows to <table>-<timestamp>.csv.gz here")
+    target.add_argument("--archive-db", default=None, help="Copy raw rows into the same tables of this SQLite file")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    parser.add_argument("--pause-ms", type=int, default=100, help="Pause between batches so the app can write")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop each table after this many batches")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000, help="SQLite busy timeout")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be processed")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] DB not found: {args.db}")
+        return 1
+    if not args.dry_run and not (args.archive_dir or args.archive_db):
+        print("[ERROR] Pass --archive-dir or --archive-db (raw rows are never deleted without an archive)")
+        return 1
+
+    cutoff = (dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=args.keep_days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
+
+    if args.dry_run:
+        for table in args.tables:
+            print(f"[INFO] {table}: {count_eligible(conn, table, cutoff)} rows older than {cutoff} (UTC)")
+        conn.close()
+        return 0
+
+    conn.executescript(SUMMARY_SCHEMA)
+    stamp = dt.datetime.now().strftime("%Y%m%dT%H%M%S")
+    if args.archive_db:
+        archive = DbArchive(conn, Path(args.archive_db))
+    else:
+        archive = CsvArchive(Path(args.archive_dir), stamp)
+
+    try:
+        for table in args.tables:
+            stats = process_table(
+                conn, table, cutoff, archive, args.batch_size, args.pause_ms / 1000.0, args.max_batches
+            )
+            print(
+                f"[OK] {table}: archived and deleted {stats['rows']} rows in {stats['batches']} batches "
+                f"({stats['summary_rows']} summary upserts)"
+            )
+            remaining = count_eligible(conn, table, cutoff)
+            if remaining:
+                print(f"[INFO] {table}: {remaining} eligible rows left (--max-batches reached)")
+    finally:
+        for path in archive.close():
+            print(f"[OK] Archive: {path}")
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+
+    print(f"[INFO] Cutoff: {cutoff} (UTC); {free_pages} free pages in the DB file (reused by new rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Sync sequencing-app/budget_holders.csv (source of truth for PIs and cost
+centers) into the budget_holders table.
+
+Rows are matched by cost_center where it identifies one CSV row, otherwise by
+normalized name + surname. Only the needed INSERTs/UPDATEs are applied; DB
+rows missing from the CSV are reported, never deleted (the app manages them
+too). Placeholder holders created by import_legacy_projects.py
+(surname = 'Legacy') are matched to their canonical holder by cost center or
+name; their projects are re-pointed in one UPDATE and the placeholders deleted.
+Everything runs in one transaction; --dry-run rolls it back.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = REPO_ROOT / "sequencing-app" / "sequencing_projects.db"
+DEFAULT_CSV_PATH = REPO_ROOT / "sequencing-app" / "budget_holders.csv"
+
+FIELDS = ("name", "surname", "cost_center", "email")
+PLACEHOLDER_SURNAME = "Legacy"
+# Cost centers that do not identify a holder ("N.A." is shared by facilities).
+NON_KEY_COST_CENTERS = {"", "n.a.", "na", "n/a", "-", "legacy"}
+
+
+def normalize(value: str | None) -> str:
+    """Case-, accent- and punctuation-insensitive form used for matching."""
+    text = unicodedata.normalize("NFKD", value or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def cost_center_key(value: str | None) -> str:
+    key = (value or "").strip().upper()
+    return "" if key.lower() in NON_KEY_COST_CENTERS else key
+
+
+def read_csv(path: Path) -> list[dict]:
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        missing = [f for f in FIELDS if f not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"missing columns in {path.name}: {', '.join(missing)}")
+        return [{f: (row.get(f) or "").strip() for f in FIELDS} for row in reader if any(row.values())]
+
+
+def name_key(row) -> tuple[str, str]:
+    return normalize(row["name"]), normalize(row["surname"])
+
+
+def plan_sync(csv_rows: list[dict], db_rows: list[sqlite3.Row]) -> dict:
+    """
+    Keyed diff of CSV vs non-placeholder DB rows, plus placeholder -> canonical
+    mapping. Canonical ids for rows still to be inserted are filled in by apply_sync.
+    """
+    cc_counts: dict[str, int] = {}
+    for row in csv_rows:
+        cc = cost_center_key(row["cost_center"])
+        cc_counts[cc] = cc_counts.get(cc, 0) + 1
+
+    canonical = [r for r in db_rows if r["surname"] != PLACEHOLDER_SURNAME]
+    placeholders = [r for r in db_rows if r["surname"] == PLACEHOLDER_SURNAME]
+    by_cc: dict[str, sqlite3.Row] = {}
+    by_name: dict[tuple, sqlite3.Row] = {}
+    for r in sorted(canonical, key=lambda r: r["id"]):
+        by_cc.setdefault(cost_center_key(r["cost_center"]), r)
+        by_name.setdefault(name_key(r), r)
+
+    inserts, updates, matched_ids = [], [], set()
+    for index, row in enumerate(csv_rows):
+        cc = cost_center_key(row["cost_center"])
+        match = None
+        if cc and cc_counts[cc] == 1 and cc in by_cc and by_cc[cc]["id"] not in matched_ids:
+            match = by_cc[cc]
+        elif name_key(row) in by_name and by_name[name_key(row)]["id"] not in matched_ids:
+            match = by_name[name_key(row)]
+        if match is None:
+            inserts.append(index)
+            continue
+        matched_ids.add(match["id"])
+        changes = {f: row[f] for f in FIELDS if (match[f] or "") != row[f]}
+        if changes:
+            updates.append((match["id"], changes))
+
+    # Placeholder matching: cost center first, then the group name against the
+    # CSV name column (or "name surname"), only when it picks exactly one CSV row.
+    csv_by_cc = {cost_center_key(r["cost_center"]): i for i, r in enumerate(csv_rows)}
+    csv_by_name: dict[str, list[int]] = {}
+    for i, row in enumerate(csv_rows):
+        for key in {normalize(row["name"]), normalize(f"{row['name']} {row['surname']}")}:
+            csv_by_name.setdefault(key, []).append(i)
+
+    remap, unmatched = [], []
+    for ph in placeholders:
+        cc = cost_center_key(ph["cost_center"])
+        if cc and cc_counts.get(cc) == 1:
+            remap.append((ph["id"], csv_by_cc[cc]))
+        elif len(csv_by_name.get(normalize(ph["name"]), [])) == 1:
+            remap.append((ph["id"], csv_by_name[normalize(ph["name"])][0]))
+        else:
+            unmatched.append(ph)
+
+    return {
+        "inserts": inserts,
+        "updates": updates,
+        "remap": remap,
+        "unmatched_placeholders": unmatched,
+        "db_only": [r for r in canonical if r["id"] not in matched_ids],
+    }
+
+
+def canonical_id(conn: sqlite3.Connection, row: dict) -> int:
+    """Id of the non-placeholder holder for a CSV row (after inserts/updates)."""
+    found = conn.execute(
+        "SELECT id FROM budget_holders WHERE name = ? AND surname = ? AND cost_center = ? AND email = ? "
+        "AND surname != ? ORDER BY id LIMIT 1",
+        (*(row[f] for f in FIELDS), PLACEHOLDER_SURNAME),
+    ).fetchone()
+    return found[0]
+
+
+def apply_sync(conn: sqlite3.Connection, csv_rows: list[dict], plan: dict) -> int:
+    """Apply the plan in the caller's transaction. Returns the number of re-pointed projects."""
+    conn.executemany(
+        "INSERT INTO budget_holders (name, surname, cost_center, email) VALUES (?, ?, ?, ?)",
+        [tuple(csv_rows[i][f] for f in FIELDS) for i in plan["inserts"]],
+    )
+    for holder_id, changes in plan["updates"]:
+        assignments = ", ".join(f"{f} = ?" for f in changes)
+        conn.execute(f"UPDATE budget_holders SET {assignments} WHERE id = ?", (*changes.values(), holder_id))
+
+    if not plan["remap"]:
+        return 0
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS budget_remap (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+    conn.execute("DELETE FROM budget_remap")
+    conn.executemany(
+        "INSERT INTO budget_remap (old_id, new_id) VALUES (?, ?)",
+        [(old_id, canonical_id(conn, csv_rows[i])) for old_id, i in plan["remap"]],
+    )
+    repointed = conn.execute(
+        """
+        UPDATE projects
+        SET budget_id = (SELECT new_id FROM budget_remap WHERE old_id = projects.budget_id)
+        WHERE budget_id IN (SELECT old_id FROM budget_remap)
+        """
+    ).rowcount
+    conn.execute("DELETE FROM budget_holders WHERE id IN (SELECT old_id FROM budget_remap)")
+    conn.execute("DROP TABLE budget_remap")
+    return repointed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sync budget_holders.csv into the budget_holders table.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to sequencing_projects.db")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV_PATH), help="Path to budget_holders.csv")
+    parser.add_argument("--dry-run", action="store_true", help="Show the changes, then roll back")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000, help="SQLite busy timeout")
+    args = parser.parse_args()
+
+    for label, path in (("CSV", args.csv), ("DB", args.db)):
+        if not os.path.exists(path):
+            print(f"[ERROR] {label} not found: {path}")
+            return 1
+
+    try:
+        csv_rows = read_csv(Path(args.csv))
+    except ValueError as exc:
+        print(f"[ERROR] {exc}")
+        return 1
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        db_rows = conn.execute("SELECT id, name, surname, cost_center, email FROM budget_holders").fetchall()
+        plan = plan_sync(csv_rows, db_rows)
+        repointed = apply_sync(conn, csv_rows, plan)
+        conn.execute("ROLLBACK" if args.dry_run else "COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    prefix = "[INFO] Would apply" if args.dry_run else "[OK] Applied"
+    print(f"{prefix}: {len(plan['inserts'])} inserts, {len(plan['updates'])} updates")
+    for i in plan["inserts"]:
+        row = csv_rows[i]
+        print(f"  + {row['name']}, {row['surname']} ({row['cost_center']})")
+    for holder_id, changes in plan["updates"]:
+        print(f"  ~ id {holder_id}: " + ", ".join(f"{f}={v!r}" for f, v in changes.items()))
+    print(
+        f"{prefix}: {len(plan['remap'])} placeholders merged into canonical holders, "
+        f"{repointed} projects re-pointed"
+    )
+    for ph in plan["unmatched_placeholders"]:
+        print(f"[WARN] Placeholder id {ph['id']} ({ph['name']}, cost center {ph['cost_center']}) has no CSV match")
+    for r in plan["db_only"]:
+        print(f"[INFO] In DB but not in CSV (kept): id {r['id']} {r['name']}, {r['surname']} ({r['cost_center']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())